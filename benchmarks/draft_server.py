@@ -0,0 +1,117 @@
+# coding: utf8
+
+from benchmarks.synthetic import synthetic_projections
+from models.projection_store import ProjectionStore
+from services.draft_server import DraftServer, DraftUniverse
+
+import argparse
+import asyncio
+import json
+import numpy as np
+import time
+import tracemalloc
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response['result']
+
+
+async def run_draft(port, draft, teams, rounds, latencies):
+    # One client per draft, every team takes the top best_pick each turn
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        await request(reader, writer, {'op': 'create', 'draft': draft})
+        for draft_round in range(rounds):
+            for team in range(teams):
+                for message in ({
+                        'op': 'best_available',
+                        'draft': draft,
+                        'n': 10
+                }, {
+                        'op': 'best_pick',
+                        'draft': draft,
+                        'team': team,
+                        'n': 1
+                }):
+                    start = time.perf_counter()
+                    result = await request(reader, writer, message)
+                    latencies[message['op']].append(time.perf_counter() -
+                                                    start)
+                start = time.perf_counter()
+                await request(reader, writer, {
+                    'op': 'pick',
+                    'draft': draft,
+                    'team': team,
+                    'player_id': result[0]['id']
+                })
+                latencies['pick'].append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load_test(universe, drafts, rounds):
+    server = DraftServer(universe)
+    tcp_server = await asyncio.start_server(server.handle_stream, '127.0.0.1',
+                                            0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    latencies = {'best_available': [], 'best_pick': [], 'pick': []}
+    teams = universe.template().state.teams
+    start = time.perf_counter()
+    async with tcp_server:
+        await asyncio.gather(*[
+            run_draft(port, f"draft{draft}", teams, rounds, latencies)
+            for draft in range(drafts)
+        ])
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+def draft_bytes(universe, drafts=100):
+    # Memory a draft adds on top of the shared universe and template
+    server = DraftServer(universe)
+    universe.template()
+    tracemalloc.start()
+    for draft in range(drafts):
+        asyncio.run(server.create(f"draft{draft}"))
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / drafts
+
+
+def run(players=3000, drafts=50, rounds=4):
+    universe = DraftUniverse(
+        ProjectionStore.from_projections(
+            list(synthetic_projections(players=players))),
+        injury_seed=0)
+    elapsed, latencies = asyncio.run(load_test(universe, drafts, rounds))
+    return {
+        'players': players,
+        'drafts': drafts,
+        'requests': sum(len(times) for times in latencies.values()),
+        'seconds': elapsed,
+        'bytes_per_draft': draft_bytes(universe),
+        'latency_ms': {
+            op: {
+                'p50': float(np.percentile(times, 50) * 1000),
+                'p99': float(np.percentile(times, 99) * 1000),
+            }
+            for op, times in latencies.items()
+        },
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Concurrent drafts against one DraftServer")
+    parser.add_argument('--players', type=int, default=3000)
+    parser.add_argument('--drafts', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=4)
+    arguments = parser.parse_args()
+    print(json.dumps(
+        run(arguments.players, arguments.drafts, arguments.rounds),
+        indent=2))
@@ -0,0 +1,122 @@
+# coding: utf8
+
+from benchmarks.suite import compare, git_commit, write_results
+from benchmarks.synthetic import synthetic_projections
+from definitions import ROOT_DIR
+from models.projection_store import ProjectionStore
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# None of these should load just to open a league from disk
+HEAVY_MODULES = [
+    'xgboost', 'sklearn', 'scipy', 'pandas', 'dill', 'yaml', 'lxml',
+    'requests', 'xmltodict'
+]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds,
+                   'modules': [module for module in {heavy!r}
+                               if module in sys.modules]}}))
+"""
+
+DISK_BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import models.league
+models.league.SNAPSHOT_FILE = {snapshot!r}
+models.league.PROJECTIONS_FILE = {snapshot!r} + '.missing'
+league = models.league.League('boot', projection_source='disk', injury_seed=0)
+league.best_available_players(n=20)
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds,
+                   'modules': [module for module in {heavy!r}
+                               if module in sys.modules]}}))
+"""
+
+
+def run_fresh(script):
+    # A new interpreter each time, so nothing is already imported
+    output = subprocess.check_output(
+        [sys.executable, '-c', script],
+        cwd=ROOT_DIR,
+        env=dict(os.environ, PYTHONPATH=ROOT_DIR))
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def timed_fresh(name, script, repeat):
+    samples = [run_fresh(script) for _run in range(repeat)]
+    return {
+        'benchmark': name,
+        'players': None,
+        'teams': None,
+        'seconds': min(sample['seconds'] for sample in samples),
+        'runs': [sample['seconds'] for sample in samples],
+        'heavy_modules': samples[-1]['modules'],
+    }
+
+
+def run(repeat=3, players=1000):
+    results = [
+        timed_fresh(f"import {module}",
+                    IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES),
+                    repeat)
+        for module in ['models.league', 'models.projection_store']
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, 'projections.npz')
+        ProjectionStore.from_projections(
+            list(synthetic_projections(players=players))).save(snapshot)
+        boot = timed_fresh(
+            "disk league boot",
+            DISK_BOOT_SCRIPT.format(snapshot=snapshot, heavy=HEAVY_MODULES),
+            repeat)
+        boot['players'] = players
+        results.append(boot)
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time imports and a cold disk league boot")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="where to write the JSON results")
+    parser.add_argument(
+        '--compare', help="earlier results JSON to check for regressions")
+    arguments = parser.parse_args()
+
+    report = run(repeat=arguments.repeat)
+    output = write_results(report, arguments.output)
+    failed = False
+    for result in report['results']:
+        heavy = ', '.join(result['heavy_modules']) or "none"
+        print(f"{result['benchmark']:<30} {result['seconds'] * 1000:>8.1f} ms"
+              f"  heavy modules loaded: {heavy}")
+        failed = failed or bool(result['heavy_modules'])
+    print(f"Results written to {output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            comparison = compare(json.load(baseline_file), report)
+        for entry in comparison:
+            flag = "REGRESSION" if entry['regression'] else ""
+            print(f"{entry['benchmark']:<30} {entry['ratio']:>6.2f}x {flag}")
+        failed = failed or any(entry['regression'] for entry in comparison)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,76 @@
+# coding: utf8
+
+from benchmarks.synthetic import synthetic_projections
+from models.player import Player
+from models.projection_store import ProjectionStore
+
+import gc
+import sys
+import tracemalloc
+
+
+class StoreOnly:
+    # Stand-in league, Player only needs the store to build
+    def __init__(self, projection_store):
+        self.projection_store = projection_store
+
+
+def traced_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def legacy_players(projections):
+    # The old layout, every player copying each weekly projection dict and
+    # keeping per-week points and start percentages in dicts of its own
+    players = {}
+    for projection in projections:
+        player = players.setdefault(
+            projection['id'], {
+                'name': projection['player'],
+                'nfl_team': projection['tm'],
+                'position': projection['position'],
+                'projections_by_week': {},
+                'points_by_week': {},
+                'independent_start_pcts': {},
+            })
+        player['projections_by_week'][projection['week']] = dict(projection)
+        player['points_by_week'][projection['week']] = 0.0
+        player['independent_start_pcts'][projection['week']] = 1.0
+    return players
+
+
+def compact_players(projections):
+    league = StoreOnly(ProjectionStore.from_projections(projections))
+    return league, {
+        player_id: Player(league=league, id=player_id)
+        for player_id in league.projection_store.ids
+    }
+
+
+def run(sizes=(1000, 10000)):
+    results = []
+    for size in sizes:
+        projections = list(synthetic_projections(players=size))
+        _players, legacy = traced_bytes(lambda: legacy_players(projections))
+        _players, compact = traced_bytes(lambda: compact_players(projections))
+        results.append({
+            'players': size,
+            'legacy_bytes': legacy,
+            'compact_bytes': compact,
+            'reduction': 1 - compact / legacy,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 10000]
+    for result in run(sizes):
+        print(f"{result['players']:>6} players: "
+              f"legacy {result['legacy_bytes'] / 1e6:.1f} MB, "
+              f"compact {result['compact_bytes'] / 1e6:.1f} MB "
+              f"({result['reduction']:.0%} smaller)")
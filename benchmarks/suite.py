@@ -0,0 +1,211 @@
+# coding: utf8
+
+from benchmarks.synthetic import (synthetic_play_by_play, synthetic_projections,
+                                  synthetic_schedule)
+from definitions import ROOT_DIR
+from models.league import League
+from models.projection_store import ProjectionStore
+from services.projection.data_cleaning.play_by_play_aggregator import PlayByPlayAggregator
+from services.projection.projection import project
+
+import argparse
+import json
+import numpy as np
+import os
+import platform
+import subprocess
+import time
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'cache', 'benchmarks')
+# (players, teams), from a small home league up to a 32 team dynasty
+SIZES = [(300, 8), (1000, 12), (3000, 16), (10000, 32)]
+REGRESSION_THRESHOLD = 1.2
+
+
+def timed(function, repeat=3, setup=None):
+    # Best of repeat runs, setup runs untimed before each one
+    runs = []
+    for _run in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def draft_rounds(league, rounds):
+    # Fill a few rounds so team level benchmarks see real rosters
+    for _round in range(rounds):
+        for team in league.teams.values():
+            player, _value = league.best_available_players(n=1)[0]
+            team.add_player(player)
+
+
+def league_benchmarks(players, teams, repeat=3):
+    store = ProjectionStore.from_projections(
+        list(synthetic_projections(players=players)))
+
+    def build():
+        return League(
+            f"benchmark_{players}_{teams}",
+            roster_settings={
+                'teams': teams,
+                'auction_budget': 200
+            },
+            projection_source=store,
+            injury_seed=0)
+
+    league = build()
+    benchmarks = {
+        'League.__init__':
+        timed(build, repeat),
+        # Construction is lazy, this is what opening a league really costs
+        'League first ranking':
+        timed(lambda: build().best_available_players(n=20), repeat),
+        'League.injury_likelihood':
+        timed(lambda: league.injury_likelihood(use_cache=False), repeat),
+        'League.calculate_replacement_level':
+        timed(league.calculate_replacement_level, repeat),
+        'League.best_available_players':
+        timed(lambda: league.best_available_players(n=20), repeat,
+              setup=league.invalidate_values),
+        'League.calculate_auction_values':
+        timed(league.calculate_auction_values, repeat,
+              setup=league.invalidate_values),
+    }
+    draft_rounds(league, 3)
+    benchmarks['Team.best_pick'] = timed(
+        lambda: league.teams[0].best_pick(n=5), repeat)
+    return benchmarks
+
+
+def project_benchmarks(seasons=1, repeat=1):
+    model_df = PlayByPlayAggregator.finalize(
+        PlayByPlayAggregator.sum_by_game(
+            PlayByPlayAggregator.prepare_columns(
+                synthetic_play_by_play(seasons=seasons))))
+    schedule = synthetic_schedule()
+    return {
+        'project':
+        timed(lambda: project(
+            schedule=schedule, model_df=model_df, use_cache=False), repeat)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES, repeat=3, include_project=True):
+    results = []
+    for players, teams in sizes:
+        for name, runs in league_benchmarks(players, teams, repeat).items():
+            results.append({
+                'benchmark': name,
+                'players': players,
+                'teams': teams,
+                'seconds': min(runs),
+                'runs': runs,
+            })
+    if include_project:
+        for name, runs in project_benchmarks().items():
+            results.append({
+                'benchmark': name,
+                'players': None,
+                'teams': None,
+                'seconds': min(runs),
+                'runs': runs,
+            })
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def result_key(result):
+    return (result['benchmark'], result['players'], result['teams'])
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    # Ratio of current to baseline time for every benchmark both runs share
+    baseline_seconds = {
+        result_key(result): result['seconds']
+        for result in baseline['results']
+    }
+    comparison = []
+    for result in current['results']:
+        key = result_key(result)
+        if key not in baseline_seconds:
+            continue
+        ratio = result['seconds'] / baseline_seconds[key]
+        comparison.append({
+            'benchmark': result['benchmark'],
+            'players': result['players'],
+            'teams': result['teams'],
+            'baseline': baseline_seconds[key],
+            'current': result['seconds'],
+            'ratio': ratio,
+            'regression': ratio > threshold,
+        })
+    return comparison
+
+
+def write_results(report, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR, f"{report['timestamp'].replace(':', '')}.json")
+    with open(output, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+    return output
+
+
+def parse_size(size):
+    players, teams = size.split('x')
+    return int(players), int(teams)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time the draft tool against synthetic leagues")
+    parser.add_argument(
+        '--sizes', nargs='+', type=parse_size,
+        help="players x teams, e.g. 300x8 10000x32")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-project', action='store_true')
+    parser.add_argument('--output', help="where to write the JSON results")
+    parser.add_argument(
+        '--compare', help="earlier results JSON to check for regressions")
+    arguments = parser.parse_args()
+
+    report = run(
+        sizes=arguments.sizes or SIZES,
+        repeat=arguments.repeat,
+        include_project=not arguments.skip_project)
+    output = write_results(report, arguments.output)
+    for result in report['results']:
+        size = (f"{result['players']} players, {result['teams']} teams"
+                if result['players'] else "")
+        print(f"{result['benchmark']:<36} {size:<26} "
+              f"{result['seconds'] * 1000:>10.1f} ms")
+    print(f"Results written to {output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            comparison = compare(json.load(baseline_file), report)
+        regressions = [entry for entry in comparison if entry['regression']]
+        for entry in comparison:
+            flag = "REGRESSION" if entry['regression'] else ""
+            print(f"{entry['benchmark']:<36} {entry['ratio']:>6.2f}x {flag}")
+        if regressions:
+            raise SystemExit(1)
@@ -0,0 +1,107 @@
+# coding: utf8
+
+from services.projection.data_cleaning.play_by_play_aggregator import (
+    DTYPES, PlayByPlayAggregator)
+
+import numpy as np
+import pandas as pd
+
+POSITION_SHARES = {'qb': 0.15, 'rb': 0.3, 'wr': 0.35, 'te': 0.2}
+NFL_TEAMS = [
+    'ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN',
+    'DET', 'GB', 'HOU', 'IND', 'JAX', 'KC', 'LAC', 'LAR', 'LV', 'MIA', 'MIN',
+    'NE', 'NO', 'NYG', 'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS'
+]
+
+
+def synthetic_projections(players=300, weeks=16, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(
+        list(POSITION_SHARES), players, p=list(POSITION_SHARES.values()))
+    # Heavy tailed talent so a few players stand out like real projections
+    talent = rng.gamma(2.0, 2.0, players)
+    for player_id in range(players):
+        position = positions[player_id]
+        for week in range(1, weeks + 1):
+            form = talent[player_id] * rng.uniform(0.6, 1.4)
+            projection = {
+                'id': player_id,
+                'week': week,
+                'position': position,
+                'player': f"Player{player_id}, Synthetic",
+                'tm': NFL_TEAMS[player_id % len(NFL_TEAMS)],
+                'rush yds': form * (3.0 if position == 'qb' else 9.0),
+                'rush tds': form * 0.05,
+                'fum': 0.1,
+            }
+            if position == 'qb':
+                projection.update({
+                    'pass yds': form * 60.0,
+                    'pass tds': form * 0.4,
+                    'int': 0.8,
+                })
+            else:
+                projection.update({
+                    'rec': form,
+                    'rec yds': form * 8.0,
+                    'rec tds': form * 0.1,
+                })
+            yield projection
+
+
+def synthetic_schedule(weeks=16, teams=NFL_TEAMS, seed=0):
+    # Same frame pull_schedule returns, one row per team per game
+    rng = np.random.default_rng(seed)
+    rows = []
+    for week in range(1, weeks + 1):
+        order = rng.permutation(teams)
+        for home, away in zip(order[::2], order[1::2]):
+            rows.append({"Offense": home, "DefensiveTeam": away,
+                         "OffenseIsHome": True, "week": week})
+            rows.append({"Offense": away, "DefensiveTeam": home,
+                         "OffenseIsHome": False, "week": week})
+    return pd.DataFrame(
+        rows, columns=["Offense", "DefensiveTeam", "OffenseIsHome", "week"])
+
+
+def synthetic_play_by_play(seasons=1, plays_per_game=150, seed=0):
+    # Raw plays with the columns and dtypes PlayByPlayAggregator reads
+    rng = np.random.default_rng(seed)
+    schedule = pd.concat([
+        synthetic_schedule(seed=seed + season)
+        for season in range(seasons)
+    ])
+    games = schedule[schedule["OffenseIsHome"]].reset_index(drop=True)
+    plays = len(games) * plays_per_game
+    game = np.repeat(np.arange(len(games)), plays_per_game)
+    home_has_ball = rng.random(plays) < 0.5
+    home = games["Offense"].to_numpy()[game]
+    away = games["DefensiveTeam"].to_numpy()[game]
+    play_type = rng.choice(["Pass", "Run", "No Play", "Punt"], plays,
+                           p=[0.5, 0.4, 0.05, 0.05])
+    pass_attempt = play_type == "Pass"
+    rush_attempt = play_type == "Run"
+    complete = pass_attempt & (rng.random(plays) < 0.63)
+    yards = np.where(complete, rng.gamma(2.0, 5.5, plays),
+                     np.where(rush_attempt, rng.normal(4.3, 5.0, plays), 0))
+    touchdown = (pass_attempt | rush_attempt) & (rng.random(plays) < 0.035)
+    frame = pd.DataFrame({
+        "GameID": 2000000000 + game,
+        "posteam": np.where(home_has_ball, home, away),
+        "DefensiveTeam": np.where(home_has_ball, away, home),
+        "HomeTeam": home,
+        "PlayType": play_type,
+        "PassOutcome": np.where(
+            complete, "Complete",
+            np.where(pass_attempt, "Incomplete Pass", None)),
+        "Passer": np.where(pass_attempt, "Synthetic Passer", None),
+        "Rusher": np.where(rush_attempt, "Synthetic Rusher", None),
+        "PassAttempt": pass_attempt,
+        "RushAttempt": rush_attempt,
+        "Touchdown": touchdown,
+        "InterceptionThrown": pass_attempt & ~complete &
+        (rng.random(plays) < 0.07),
+        "EPA": np.where(touchdown, 3.0, rng.normal(0, 1.5, plays)),
+        "Yards.Gained": yards,
+    })
+    return PlayByPlayAggregator.share_team_categories(frame.astype(DTYPES))
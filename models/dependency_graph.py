@@ -0,0 +1,43 @@
+# coding: utf8
+
+from services.instrumentation import instrumentation
+
+
+class DependencyGraph:
+    # Values are computed on first use and dropped, along with everything
+    # downstream, when something they depend on changes
+    def __init__(self, name):
+        self.name = name
+        self.computes = {}
+        self.downstream = {}
+        self.values = {}
+
+    def add(self, node, compute, dependencies=()):
+        self.computes[node] = compute
+        for dependency in dependencies:
+            self.downstream.setdefault(dependency, []).append(node)
+
+    def get(self, node):
+        instrumentation.cache(f"{self.name}.{node}", node in self.values)
+        if node not in self.values:
+            self.values[node] = self.computes[node]()
+        return self.values[node]
+
+    def peek(self, node):
+        # The value only if it's already computed, for in place updates
+        return self.values.get(node)
+
+    def set(self, node, value):
+        self.invalidate(node)
+        self.values[node] = value
+
+    def invalidate(self, node):
+        stale = [node]
+        while stale:
+            node = stale.pop()
+            self.values.pop(node, None)
+            stale.extend(self.downstream.get(node, []))
+
+    def invalidate_downstream(self, node):
+        for dependent in self.downstream.get(node, []):
+            self.invalidate(dependent)
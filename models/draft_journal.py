@@ -0,0 +1,86 @@
+# coding: utf8
+
+from services.atomic_file import atomic_write
+
+import json
+import os
+
+BASE_SETTINGS = [
+    'name', 'scoring_settings', 'roster_settings', 'projection_source',
+    'injury_seed', 'dynamic_replacement_level'
+]
+
+
+class DraftJournal:
+    def __init__(self, directory):
+        self.directory = directory
+        self.base_path = os.path.join(directory, 'base.json')
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+
+    @classmethod
+    def create(cls, league, directory):
+        if not isinstance(league.projection_source, str):
+            # Resuming rebuilds the league from base.json, so the source
+            # has to be something it can load again
+            raise ValueError(
+                "Journaled leagues need a projection source that can be "
+                "reloaded, export the store with League.export_universe and "
+                "use the universe file as the source")
+        journal = cls(directory)
+        os.makedirs(directory, exist_ok=True)
+        base = {setting: getattr(league, setting) for setting in BASE_SETTINGS}
+        if base['projection_source'] == "web":
+            # Scraping again could change projections or ids under the
+            # journaled picks. Loading from the web saves the disk snapshot
+            league.projection_store
+            base['projection_source'] = "disk"
+        # Picks made before the journal started are replayed without prices
+        base['auction_budget_spent'] = league.auction_budget_spent
+        with atomic_write(journal.base_path, 'w', fsync=True) as output:
+            json.dump(base, output)
+        # A new base starts a new journal
+        with open(journal.journal_path, 'w') as output:
+            os.fsync(output.fileno())
+        return journal
+
+    def read_base(self):
+        with open(self.base_path) as base:
+            return json.load(base)
+
+    def append(self, entry):
+        with open(self.journal_path, 'a') as output:
+            output.write(json.dumps(entry) + '\n')
+            output.flush()
+            os.fsync(output.fileno())
+
+    def entries(self):
+        return [entry for entry, _end in self.valid_entries()]
+
+    def valid_entries(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        with open(self.journal_path, 'rb') as journal:
+            contents = journal.read()
+        entries = []
+        end = 0
+        for line in contents.splitlines(keepends=True):
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError("Incomplete entry")
+                entries.append((json.loads(line), end + len(line)))
+            except ValueError:
+                # A crash mid append can only tear the last line
+                break
+            end += len(line)
+        return entries
+
+    def repair(self):
+        # Drop a torn tail so new entries don't land on a partial line
+        entries = self.valid_entries()
+        end = entries[-1][1] if entries else 0
+        if os.path.exists(self.journal_path) and os.path.getsize(
+                self.journal_path) != end:
+            with open(self.journal_path, 'r+b') as journal:
+                journal.truncate(end)
+                journal.flush()
+                os.fsync(journal.fileno())
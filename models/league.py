@@ -1,75 +1,177 @@
 # coding: utf8
 
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from definitions import ROOT_DIR
+from models.dependency_graph import DependencyGraph
+from models.draft_journal import DraftJournal
+from models.mapped_universe import attach_universe, export_universe
+from models.name_index import NameIndex
 from models.player import Player
+from models.projection_store import ProjectionStore
+from models.rankings import PlayerRanking
+from models.settings import (DEFAULT_ROSTER_SETTINGS, DEFAULT_SCORING_SETTINGS,
+                             TrackedSettings, merge_settings)
 from models.team import Team
-from services.scrape_projections import scrape_projections
-from services.projection.projection import project
+from models.valuation import (ReplacementIndex, independent_start_pcts,
+                              values_over_replacement, weekly_rank_tables)
+from services.injury_simulator import (INJURY_SIMULATIONS, INJURY_STATS,
+                                       simulate_injury_rates)
+from services.instrumentation import instrumentation, timed
 
-import dill
 import numpy as np
 import os
-import yaml
+import time
+
+# Scraping, the projection model, dill, pandas and yaml are imported where
+# they're used, so opening a saved league doesn't pay for them
+PROJECTIONS_FILE = os.path.join(ROOT_DIR, 'projections', 'v0.pkl')
+SNAPSHOT_FILE = os.path.join(ROOT_DIR, 'projections', 'v0.npz')
+UNIVERSE_FILE = os.path.join(ROOT_DIR, 'projections', 'v0.universe')
+
+USAGE_COLUMNS = [
+    "RushYards", "RushTD", "PassYards", "PassTD", "CompletePass"
+]
+
 
 class League:
+    @timed('League.__init__')
     def __init__(self,
                  name,
                  scoring_settings=None,
                  roster_settings=None,
-                 projection_source="web"):
+                 projection_source="web",
+                 injury_seed=None,
+                 dynamic_replacement_level=False):
         self.name = name
         self.projection_source = projection_source
-        if not scoring_settings:
-            scoring_settings = {}
-        self.scoring_settings = {
-            # I hate spaces in keys, but this allows projection parsing
-            # to be much more elegant
-            'pass yds': 0.04,
-            'pass tds': 4.0,
-            'int': -2.0,
-            'rush yds': 0.1,
-            'rush tds': 6.0,
-            'rec': 0.0,
-            'rec yds': 0.1,
-            'rec tds': 6.0,
-            'fum': -2.0,
-        }
-        for key, value in scoring_settings.items():
-            self.scoring_settings[key] = value
-
-        if not roster_settings:
-            roster_settings = {}
-        self.roster_settings = {
-            'teams': 10,
-            'roster_size': 16,
-            'defense': 1,
-            'kicker': 1,
-            'qb': 1,
-            'rb': 2,
-            'wr': 2,
-            'te': 1,
-            'flex': 1,
-            'flex_positions': ['rb', 'wr', 'te'],
-            'auction_budget': None
-        }
-        for key, value in roster_settings.items():
-            self.roster_settings[key] = value
+        self.injury_seed = injury_seed
+        self.dynamic_replacement_level = dynamic_replacement_level
+        self.graph = self.dependency_graph()
+        self.journal = None
+        self.scoring_settings = scoring_settings
+        self.roster_settings = roster_settings
+        self.team_names = {}
         self.teams = {
             id: Team(id=id, league=self)
             for id in range(self.roster_settings['teams'])
         }
+        self.auction_budget_spent = 0
+        self.mapped_universe = None
+
+    def dependency_graph(self):
+        # Everything below is computed on first use
+        graph = DependencyGraph('League')
+        graph.add('projection_store', self.load_projection_store)
+        graph.add('player_universe', self.build_player_universe,
+                  ['projection_store'])
+        graph.add('player_names', self.build_player_names,
+                  ['player_universe'])
+        graph.add('available_players', self.build_available_players,
+                  ['player_universe'])
+        graph.add('points_matrix', self.build_points_matrix,
+                  ['projection_store', 'scoring_settings'])
+        graph.add('injury_simulations', self.build_injury_simulations)
+        graph.add('rank_tables', self.build_rank_tables,
+                  ['points_matrix', 'roster_settings'])
+        graph.add('start_pcts', self.build_start_pcts,
+                  ['rank_tables', 'injury_simulations', 'roster_settings'])
+        graph.add('replacement_index', self.build_replacement_index,
+                  ['points_matrix', 'roster_settings'])
+        graph.add('replacement_level', self.build_replacement_level,
+                  ['replacement_index'])
+        graph.add('vor', lambda: self.build_values_over_replacement(False),
+                  ['points_matrix', 'injury_simulations', 'replacement_level'])
+        graph.add('auction_vor',
+                  lambda: self.build_values_over_replacement(True),
+                  ['points_matrix', 'injury_simulations', 'replacement_level',
+                   'start_pcts'])
+        graph.add('ranking', lambda: self.build_player_ranking(False),
+                  ['vor', 'available_players'])
+        graph.add('auction_ranking', lambda: self.build_player_ranking(True),
+                  ['auction_vor', 'available_players'])
+        graph.add('auction_totals', self.build_auction_totals,
+                  ['auction_vor', 'available_players', 'roster_settings'])
+        return graph
+
+    # Changing a setting, in place or by assigning new settings, only drops
+    # what was derived from it
+    @property
+    def scoring_settings(self):
+        return self._scoring_settings
+
+    @scoring_settings.setter
+    def scoring_settings(self, scoring_settings):
+        self._scoring_settings = TrackedSettings(
+            merge_settings(DEFAULT_SCORING_SETTINGS, scoring_settings),
+            self.scoring_settings_changed)
+        self.scoring_settings_changed()
+
+    @property
+    def roster_settings(self):
+        return self._roster_settings
+
+    @roster_settings.setter
+    def roster_settings(self, roster_settings):
+        self._roster_settings = TrackedSettings(
+            merge_settings(DEFAULT_ROSTER_SETTINGS, roster_settings),
+            self.roster_settings_changed)
+        self.roster_settings_changed()
+
+    def scoring_settings_changed(self):
+        self.graph.invalidate_downstream('scoring_settings')
+        self.record_settings('scoring_settings')
+
+    def roster_settings_changed(self):
+        self.graph.invalidate_downstream('roster_settings')
+        self.record_settings('roster_settings')
 
-        self.player_universe = {}
-        self.fill_player_universe()
-        self.available_players = self.player_universe.copy()
-        self.injury_likelihood()
-        self.calculate_replacement_level()
-        if self.roster_settings['auction_budget']:
-            self.auction_budget_spent = 0
-            self.calculate_auction_values()
+    @property
+    def projection_store(self):
+        return self.graph.get('projection_store')
+
+    @property
+    def player_universe(self):
+        return self.graph.get('player_universe')
+
+    @property
+    def player_names(self):
+        return self.graph.get('player_names')
+
+    @property
+    def available_players(self):
+        return self.graph.get('available_players')
+
+    @property
+    def points_matrix(self):
+        # players x weeks, rows follow self.projection_store.ids
+        return self.graph.get('points_matrix')
+
+    @property
+    def injury_simulations(self):
+        return self.graph.get('injury_simulations')
+
+    @property
+    def replacement_index(self):
+        return self.graph.get('replacement_index')
+
+    @property
+    def replacement_level(self):
+        return self.graph.get('replacement_level')
+
+    @property
+    def auction_vor(self):
+        return self.graph.get('auction_vor')
+
+    @property
+    def auction_budget_available(self):
+        return self.graph.get('auction_totals')['budget_available']
+
+    @property
+    def auction_value_available(self):
+        return self.graph.get('auction_totals')['value_available']
 
     def save_to_disk(self, filename=None):
+        import dill
         file_path = os.path.join(ROOT_DIR, 'leagues',
                                  f"{filename if filename else self.name}.pkl")
         with open(file_path, 'wb') as output:
@@ -77,239 +179,516 @@ class League:
 
     @classmethod
     def load_from_disk(cls, filename):
+        import dill
         file_path = os.path.join(ROOT_DIR, 'leagues',
                                  "{}.pkl".format(filename))
         with open(file_path, 'rb') as saved_object:
             output = dill.load(saved_object)
         return output
 
+    def start_journal(self, filename=None):
+        self.journal = DraftJournal.create(
+            self,
+            os.path.join(ROOT_DIR, 'leagues',
+                         filename if filename else self.name))
+        for team in self.teams.values():
+            if team.name is not None:
+                self.journal.append({
+                    'op': 'rename',
+                    'team_id': team.id,
+                    'name': team.name
+                })
+            for player_id, player in team.players_by_id.items():
+                self.journal.append({
+                    'op': 'pick',
+                    'player_id': player_id,
+                    'team_id': team.id,
+                    'price': None
+                })
+        return self.journal
+
+    @classmethod
+    def resume(cls, filename):
+        journal = DraftJournal(os.path.join(ROOT_DIR, 'leagues', filename))
+        journal.repair()
+        base = journal.read_base()
+        auction_budget_spent = base.pop('auction_budget_spent', 0)
+        league = cls(**base)
+        league.auction_budget_spent = auction_budget_spent
+        for entry in journal.entries():
+            if entry['op'] == 'pick':
+                league.teams[entry['team_id']].add_player(
+                    league.player_universe[entry['player_id']],
+                    entry['price'])
+            elif entry['op'] == 'drop':
+                league.teams[entry['team_id']].remove_player(
+                    entry['player_id'])
+            elif entry['op'] == 'rename':
+                league.teams[entry['team_id']].name = entry['name']
+            elif entry['op'] == 'settings':
+                setattr(league, entry['settings'], entry['values'])
+        league.journal = journal
+        return league
+
     def __repr__(self):
         return f"League {self.name}, {self.roster_settings['teams']} teams"
 
-    def fill_player_universe(self, source=None):
+    def load_projection_store(self, source=None):
         source = source or self.projection_source
-        if source == "web":
+        self.mapped_universe = None
+        if isinstance(source, ProjectionStore):
+            return source
+        elif universe_file(source):
+            # Read only and zero copy, pages are shared with every other
+            # process attached to the same file
+            self.mapped_universe = attach_universe(universe_file(source))
+            return self.mapped_universe.projection_store
+        elif source == "web":
+            import dill
+            from services.scrape_projections import scrape_projections
             all_projections = list(scrape_projections())
-            import ipdb; ipdb.set_trace()
-            file_path = os.path.join(ROOT_DIR, 'projections', 'v0.pkl')
-            with open(file_path, 'wb') as output:
+            os.makedirs(os.path.dirname(PROJECTIONS_FILE), exist_ok=True)
+            with open(PROJECTIONS_FILE, 'wb') as output:
                 dill.dump(all_projections, output)
+            projection_store = ProjectionStore.from_projections(
+                all_projections)
+            projection_store.save(SNAPSHOT_FILE)
+            return projection_store
         elif source == "disk":
-            file_path = os.path.join(ROOT_DIR, 'projections', 'v0.pkl')
-            with open(file_path, 'rb') as saved_projections:
+            # The snapshot loads with numpy alone, the raw projections are
+            # only read once to build it
+            if (os.path.exists(SNAPSHOT_FILE) and
+                    (not os.path.exists(PROJECTIONS_FILE) or
+                     os.path.getmtime(SNAPSHOT_FILE) >=
+                     os.path.getmtime(PROJECTIONS_FILE))):
+                return ProjectionStore.load(SNAPSHOT_FILE)
+            import dill
+            with open(PROJECTIONS_FILE, 'rb') as saved_projections:
                 all_projections = dill.load(saved_projections)
+            projection_store = ProjectionStore.from_projections(
+                all_projections)
+            projection_store.save(SNAPSHOT_FILE)
+            return projection_store
         elif source == "projection":
-            team_projections = project()
-            with open(os.path.join(ROOT_DIR, "services", "projection", "players.yml")) as file:
-                usage = yaml.safe_load(file)
-            all_projections = []
-            for id, player in enumerate(usage):
-                player = defaultdict(int, player)
-                team_weeks = team_projections[team_projections.Offense == player["team"]]
-                for _idx, week in team_weeks.iterrows():
-                    all_projections.append({
-                        "id": id, 
-                        "week": week["week"],
-                        "position": player["position"],
-                        "player": player["name"],
-                        "tm": player["team"],
-                        "rush yds": player["RushYards"] * week["RushYards"],
-                        "rush tds": player["RushTD"] * week["RushTD"],
-                        "rec yds": player["PassYards"] * week["PassYards"],
-                        "rec tds": player["PassTD"] * week["PassTD"],
-                        "rec": player["CompletePass"] * week["CompletePass"],
-                        "pass yds": (player["position"] == "qb") * week["PassYards"],
-                        "pass tds": (player["position"] == "qb") * week["PassTD"],
-                        "int": (player["position"] == "qb") * week["InterceptionThrown"],
-                    })
- 
-                
+            from services.projection.projection import project
+            return ProjectionStore.from_frame(usage_projections(project()))
         else:
             raise KeyError(
                 f"Invalid source {source} must be \'web\' or \'disk\' or \'projection\'")
-        for projection in all_projections:
-            if projection['id'] not in self.player_universe:
-                self.player_universe[projection['id']] = Player(
-                    league=self, projection=projection)
-            else:
-                self.player_universe[projection['id']].add_projection(
-                    projection)
+
+    @timed('League.fill_player_universe')
+    def fill_player_universe(self, source=None):
+        self.graph.set('projection_store', self.load_projection_store(source))
+
+    def attached_universe(self):
+        # Attaching happens with the projection store, so load that first
+        if universe_file(self.projection_source):
+            self.projection_store
+        return self.mapped_universe
+
+    def export_universe(self, file_path=UNIVERSE_FILE):
+        # Projections, this league's points and injury tables in one file
+        # other leagues and processes can attach to
+        return export_universe(
+            file_path,
+            self.projection_store,
+            points=self.points_matrix,
+            scoring_settings=dict(self.scoring_settings),
+            injury_simulations=self.injury_simulations,
+            injury_seed=self.injury_seed)
+
+    def build_player_universe(self):
+        return {
+            player_id: Player(league=self, id=player_id)
+            for player_id in self.projection_store.ids
+        }
+
+    def build_player_names(self):
+        return NameIndex({
+            player_id: player.name
+            for player_id, player in self.player_universe.items()
+        })
+
+    def build_available_players(self):
+        rostered = {
+            player_id
+            for team in self.teams.values() for player_id in team.players_by_id
+        }
+        return {
+            player_id: player
+            for player_id, player in self.player_universe.items()
+            if player_id not in rostered
+        }
+
+    @timed('League.score_projections')
+    def build_points_matrix(self):
+        mapped = self.attached_universe()
+        if (mapped and mapped.points is not None
+                and dict(self.scoring_settings) == mapped.scoring_settings):
+            return mapped.points
+        return self.projection_store.weekly_points(self.scoring_settings)
+
+    def score_projections(self, scoring_settings=None):
+        if scoring_settings:
+            self.scoring_settings.update(scoring_settings)
+        self.graph.invalidate('points_matrix')
+
+    def build_rank_tables(self):
+        return weekly_rank_tables(self.points_matrix,
+                                  self.projection_store.positions,
+                                  self.roster_settings['flex_positions'])
+
+    def weekly_rank_tables(self):
+        return self.graph.get('rank_tables')
+
+    def build_start_pcts(self):
+        return independent_start_pcts(
+            self.weekly_rank_tables(), self.projection_store.positions,
+            self.injury_simulations, self.roster_settings)
+
+    def independent_start_pcts(self):
+        return self.graph.get('start_pcts')
 
     def team_by_name(self, team_name):
-        team_id, = [
-            id for id, team in self.teams.items()
-            if str(team.name) == team_name
-        ]
-        if team_id is None:
+        if team_name not in self.team_names:
             raise KeyError(f"Team with name {team_name} not found")
-        return self.teams[team_id]
+        return self.teams[self.team_names[team_name]]
 
     def player_by_name(self, player_name):
-        player_id, = [
-            id for id, player in self.player_universe.items()
-            if player.name == player_name
-        ]
-        if not player_id:
+        player_ids = self.player_names.exact_match(player_name)
+        if len(player_ids) > 1:
+            # Fall back on the exact spelling to split normalized collisions
+            player_ids = [
+                player_id for player_id in player_ids
+                if self.player_universe[player_id].name == player_name
+            ]
+        if not player_ids:
             raise KeyError(f"Player with name {player_name} not found")
-        return self.player_universe[player_id]
+        if len(player_ids) > 1:
+            raise ValueError(f"Multiple players named {player_name}")
+        return self.player_universe[player_ids[0]]
 
-    def player_fuzzy_match(self, player_name_substring):
+    def player_fuzzy_match(self, player_name_substring, n=None):
         players = [
-            player for id, player in self.player_universe.items()
-            if player_name_substring.lower() in player.name.lower()
+            self.player_universe[player_id]
+            for player_id in self.player_names.search(
+                player_name_substring, n=n)
         ]
         if not players:
             raise KeyError(
                 f"Player name containing {player_name_substring} not found")
         return players[0] if len(players) == 1 else players
 
-    def injury_likelihood(self):
-        self.injury_simulations = {}
-        # Obtained from
-        # http://www.profootballlogic.com/articles/nfl-injury-rate-analysis/
-        # Poisson probably isn't perfect here, distribution is likely bimodal
-        # Where season ending injuries are the second mode
-        # This feels close enough
-        injury_stats = {
-            'rb': {
-                'likelihood': 0.051,
-                'duration_mean': 3.9,
-            },
-            'wr': {
-                'likelihood': .045,
-                'duration_mean': 3.2
-            },
-            'qb': {
-                'likelihood': .025,
-                'duration_mean': 3.1
-            },
-            'te': {
-                'likelihood': .049,
-                'duration_mean': 2.6
-            }
-        }
-        for position, injury_stat in injury_stats.items():
-            injury_weeks = np.zeros([10000, 16])
-            for simulation in range(10000):
-                injured = [0] * 16
-                for week in range(16):
-                    if injured[week] == 0:
-                        got_injured = np.random.random_sample(
-                        ) <= injury_stat['likelihood']
-                        if got_injured:
-                            injury_length, = np.random.poisson(
-                                injury_stat['duration_mean'], 1)
-                            if injury_length > 0:
-                                last_injured_week = np.min(
-                                    [week + injury_length, 16])
-                                injured[week:last_injured_week] = [1] * (
-                                    last_injured_week - week)
-                injury_weeks[simulation] = injured
-
-            self.injury_simulations[position] = injury_weeks.mean(axis=0)
+    @timed('League.injury_likelihood')
+    def build_injury_simulations(self, seed=None, use_cache=True):
+        mapped = self.attached_universe()
+        if (mapped and mapped.injury_simulations and seed is None and use_cache
+                and self.injury_seed in (None, mapped.injury_seed)):
+            return mapped.injury_simulations
+        return simulate_injury_rates(
+            INJURY_STATS,
+            simulations=INJURY_SIMULATIONS,
+            seed=self.injury_seed if seed is None else seed,
+            use_cache=use_cache)
+
+    def injury_likelihood(self, seed=None, use_cache=True):
+        self.graph.set('injury_simulations',
+                       self.build_injury_simulations(seed, use_cache))
+
+    @timed('League.calculate_replacement_level')
+    def build_replacement_index(self):
+        replacement_index = ReplacementIndex(
+            ids=self.projection_store.ids,
+            positions=self.projection_store.positions,
+            season_points=self.points_matrix.sum(axis=1),
+            roster_settings=self.roster_settings)
+        if self.dynamic_replacement_level:
+            for team in self.teams.values():
+                for player_id in team.players_by_id:
+                    replacement_index.draft(player_id)
+        return replacement_index
+
+    def build_replacement_level(self):
+        return self.replacement_index.levels()
 
     def calculate_replacement_level(self):
-        self.replacement_level = {}
-        positions_to_check = ['qb', 'wr', 'rb', 'te']
-
-        # Start with all players sorted by season points
-        remaining_players = sorted(
-            self.player_universe.values(),
-            key=lambda player: player.season_points(),
-            reverse=True)
-        removed_ids = []
-
-        total_bench_spots = (self.roster_settings['teams'] * (
-            self.roster_settings['roster_size'] -
-            (self.roster_settings['defense'] + self.roster_settings['kicker'] +
-             self.roster_settings['qb'] + self.roster_settings['rb'] +
-             self.roster_settings['wr'] + self.roster_settings['te'] +
-             self.roster_settings['flex'])))
-        starter_counts = {}
-        for position in positions_to_check:
-            starter_counts[position] = (
-                self.roster_settings[position] * self.roster_settings['teams'])
-
-        # I hate hardcoding this but can't think of a better way
-        # QBs not being flexed makes it hard to assess their replacement level
-        # So I chose to replicate general roster distribution
-
-        starter_counts['qb'] += np.round(0.1 * total_bench_spots)
-        total_bench_spots = np.round(0.9 * total_bench_spots)
-
-        # Take out non-flex starters (and bench QBs)
-        for position in positions_to_check:
-            position_filtered = list(
-                filter(lambda player: player.position == position,
-                       remaining_players.copy()))
-            ids_to_remove = [
-                player.id
-                for player in position_filtered[:int(starter_counts[position])]
-            ]
-            remaining_players = list(
-                filter(lambda x: x.id not in ids_to_remove, remaining_players))
-            removed_ids.extend(ids_to_remove)
-
-        # Take out flex starters and other bench spots
-        flex_starters = (
-            self.roster_settings['flex'] * self.roster_settings['teams'])
-        position_filtered = list(
-            filter(
-                lambda player: player.position in self.roster_settings['flex_positions'],
-                remaining_players.copy()))
-        ids_to_remove = [
-            player.id for player in
-            position_filtered[:int(flex_starters + total_bench_spots)]
+        self.graph.invalidate('replacement_index')
+        return self.replacement_level
+
+    @timed('League.update_replacement_level')
+    def update_replacement_level(self, player, drafted=True):
+        # Before the index is built there's nothing to update, it picks up
+        # the rosters when it is
+        replacement_index = self.graph.peek('replacement_index')
+        if not self.dynamic_replacement_level or replacement_index is None:
+            return
+        if drafted:
+            replacement_index.draft(player.id)
+        else:
+            replacement_index.release(player.id)
+        replacement_level = replacement_index.levels()
+        if replacement_level != self.graph.peek('replacement_level'):
+            self.graph.set('replacement_level', replacement_level)
+
+    def invalidate_values(self):
+        self.graph.invalidate('vor')
+        self.graph.invalidate('auction_vor')
+
+    def build_values_over_replacement(self, auction):
+        return values_over_replacement(
+            self.points_matrix,
+            self.projection_store.positions,
+            self.injury_simulations,
+            self.replacement_level,
+            start_pcts=self.independent_start_pcts() if auction else None)
+
+    def values_over_replacement(self, auction=False):
+        return self.graph.get('auction_vor' if auction else 'vor')
+
+    def build_player_ranking(self, auction):
+        return PlayerRanking(
+            values=self.values_over_replacement(auction),
+            ids=self.projection_store.ids,
+            positions=self.projection_store.positions,
+            available_ids=self.available_players)
+
+    def player_ranking(self, auction=False):
+        return self.graph.get('auction_ranking' if auction else 'ranking')
+
+    def built_rankings(self):
+        return [
+            ranking for ranking in (self.graph.peek('ranking'),
+                                    self.graph.peek('auction_ranking'))
+            if ranking is not None
         ]
-        remaining_players = list(
-            filter(lambda x: x.id not in ids_to_remove, remaining_players))
-        removed_ids.extend(ids_to_remove)
-        assert (len(removed_ids) == (
-            self.roster_settings['roster_size'] -
-            self.roster_settings['kicker'] - self.roster_settings['defense']) *
-                self.roster_settings['teams'])
-
-        # Now take the first player at each position for replacement level
-        for position in positions_to_check:
-            position_filtered = list(
-                filter(lambda player: player.position == position,
-                       remaining_players.copy()))
-            self.replacement_level[position] = position_filtered[
-                0].season_points()
 
+    @timed('League.best_available_players')
     def best_available_players(self, position=None, n=20, auction=False):
-        desired_output = ("auction_value"
-                          if auction else "value_over_replacement")
-        if position:
-            eligible_players = [
-                player for player in self.available_players.values()
-                if player.position == position
-            ]
-        else:
-            eligible_players = self.available_players.values()
-        sorted_players = sorted(
-            eligible_players,
-            key=lambda player: getattr(player, desired_output)(),
-            reverse=True)[:n]
-        return [(player, np.round(getattr(player, desired_output)()))
-                for player in sorted_players]
+        # Auction values are a constant multiple of auction VOR, so both
+        # rank off the same memoized values
+        ranking = self.player_ranking(auction)
+        scale = (self.auction_budget_available / self.auction_value_available
+                 if auction else 1)
+        return [(self.player_universe[player_id], np.round(value * scale))
+                for player_id, value in ranking.top(n, position)]
+
+    @timed('League.record_pick')
+    def record_pick(self, player, auction_price=None):
+        if self.journal:
+            self.journal.append({
+                'op': 'pick',
+                'player_id': player.id,
+                'team_id': player.team_id,
+                'price': auction_price
+            })
+        self.update_auction_values(
+            player, drafted=True, auction_price=auction_price)
+        for ranking in self.built_rankings():
+            ranking.remove(player.id)
+        self.update_replacement_level(player, drafted=True)
+
+    @timed('League.record_drop')
+    def record_drop(self, player, team_id=None):
+        if self.journal:
+            self.journal.append({
+                'op': 'drop',
+                'player_id': player.id,
+                'team_id': team_id
+            })
+        self.update_auction_values(player, drafted=False)
+        for ranking in self.built_rankings():
+            ranking.add(player.id)
+        self.update_replacement_level(player, drafted=False)
+
+    def record_rename(self, team):
+        if self.journal:
+            self.journal.append({
+                'op': 'rename',
+                'team_id': team.id,
+                'name': team.name
+            })
+
+    def record_settings(self, settings):
+        # The whole dict, so replaying doesn't depend on which edit it was
+        if self.journal:
+            self.journal.append({
+                'op': 'settings',
+                'settings': settings,
+                'values': dict(getattr(self, settings))
+            })
+
+    @timed('League.calculate_auction_values')
+    def build_auction_totals(self):
+        return {
+            'budget_available':
+            ((self.roster_settings['auction_budget'] -
+              self.roster_settings['defense'] - self.roster_settings['kicker'])
+             * self.roster_settings['teams'] - self.auction_budget_spent),
+            'value_available':
+            sum([
+                self.auction_vor[player.row]
+                for player in self.available_players.values()
+            ])
+        }
 
     def calculate_auction_values(self):
         if not self.roster_settings['auction_budget']:
             return
-        self.auction_values = {}
-        total_available_budget = (
-            (self.roster_settings['auction_budget'] -
-             self.roster_settings['defense'] - self.roster_settings['kicker'])
-            * self.roster_settings['teams'] - self.auction_budget_spent)
-        total_value_available = sum([
-            player.value_over_replacement(auction=True)
-            for player in self.available_players.values()
-        ])
-        for player_id, player in self.available_players.items():
-            self.auction_values[player_id] = (
-                player.value_over_replacement(auction=True) *
-                total_available_budget / total_value_available)
+        self.graph.invalidate('auction_totals')
+        self.graph.get('auction_totals')
+
+    def update_auction_values(self, player, drafted=True, auction_price=None):
+        # Keep running totals so a pick only moves the drafted player's share
+        if not self.roster_settings['auction_budget']:
+            return
+        if auction_price:
+            self.auction_budget_spent += auction_price
+        totals = self.graph.peek('auction_totals')
+        if totals is None:
+            return
+        if auction_price:
+            totals['budget_available'] -= auction_price
+        if drafted:
+            totals['value_available'] -= self.auction_vor[player.row]
+        else:
+            totals['value_available'] += self.auction_vor[player.row]
+
+    def auction_value(self, player_id):
+        return (self.auction_vor[self.projection_store.index[player_id]] *
+                self.auction_budget_available / self.auction_value_available)
+
+    @property
+    def auction_values(self):
+        return {
+            player_id: self.auction_value(player_id)
+            for player_id in self.available_players
+        }
+
+    @timed('League.evaluate_scenarios')
+    def evaluate_scenarios(self, scenarios):
+        # Compare other scoring and roster settings against this league's
+        # universe and injury simulations without building new leagues
+        from services.scenario_evaluator import evaluate_scenarios
+        return evaluate_scenarios(
+            self.projection_store,
+            scenarios,
+            injury_simulations=self.injury_simulations)
+
+    @timed('League.best_picks')
+    def best_picks(self, n=5, executor=None, max_workers=None):
+        # Warm the shared caches once so workers only do per-roster work
+        self.values_over_replacement()
+        start = time.perf_counter()
+        if executor is None:
+            results = {
+                team_id: timed_best_pick(team, n)
+                for team_id, team in self.teams.items()
+            }
+        elif executor == "thread":
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    team_id: pool.submit(timed_best_pick, team, n)
+                    for team_id, team in self.teams.items()
+                }
+                results = {
+                    team_id: future.result()
+                    for team_id, future in futures.items()
+                }
+        elif executor == "process":
+            with ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    initializer=set_worker_league,
+                    initargs=(self, )) as pool:
+                futures = {
+                    team_id: pool.submit(worker_best_pick, team_id, n)
+                    for team_id in self.teams
+                }
+                results = {}
+                for team_id, future in futures.items():
+                    picks, elapsed = future.result()
+                    results[team_id] = ([(self.player_universe[player_id],
+                                          value)
+                                         for player_id, value in picks],
+                                        elapsed)
+        else:
+            raise KeyError(
+                f"Invalid executor {executor} must be None, 'thread' or 'process'"
+            )
+        self.best_pick_timings = {
+            team_id: elapsed
+            for team_id, (_picks, elapsed) in results.items()
+        }
+        self.best_pick_timings['total'] = time.perf_counter() - start
+        return {team_id: picks for team_id, (picks, _elapsed) in results.items()}
+
+    def perf_report(self):
+        # Timings and cache counters since instrumentation was last reset,
+        # switch it on with instrumentation.enable()
+        return instrumentation.report()
+
+    def perf_records(self):
+        return list(instrumentation.records)
 
     # TODO:
     # How many points would player X add to team Y (using injuries)
+
+
+def usage_projections(team_projections):
+    import pandas as pd
+    import yaml
+    with open(os.path.join(ROOT_DIR, "services", "projection", "players.yml")) as file:
+        usage = pd.DataFrame(yaml.safe_load(file))
+    usage = usage.reindex(
+        columns=["name", "position", "team"] + USAGE_COLUMNS).fillna(
+            {column: 0
+             for column in USAGE_COLUMNS})
+    usage["id"] = range(len(usage))
+    # Every player week is the player's usage share times the team's week
+    player_weeks = usage.rename(
+        columns={column: f"{column}Share"
+                 for column in USAGE_COLUMNS}).merge(
+                     team_projections, left_on="team", right_on="Offense")
+    player_weeks = player_weeks.sort_values(["id"], kind="stable")
+    is_qb = player_weeks["position"] == "qb"
+    return pd.DataFrame({
+        "id": player_weeks["id"],
+        "week": player_weeks["week"],
+        "position": player_weeks["position"],
+        "player": player_weeks["name"],
+        "tm": player_weeks["team"],
+        "rush yds": player_weeks["RushYardsShare"] * player_weeks["RushYards"],
+        "rush tds": player_weeks["RushTDShare"] * player_weeks["RushTD"],
+        "rec yds": player_weeks["PassYardsShare"] * player_weeks["PassYards"],
+        "rec tds": player_weeks["PassTDShare"] * player_weeks["PassTD"],
+        "rec": player_weeks["CompletePassShare"] * player_weeks["CompletePass"],
+        "pass yds": is_qb * player_weeks["PassYards"],
+        "pass tds": is_qb * player_weeks["PassTD"],
+        "int": is_qb * player_weeks["InterceptionThrown"],
+    })
+
+
+def universe_file(source):
+    if source == "mapped":
+        return UNIVERSE_FILE
+    if isinstance(source, str) and source.endswith('.universe'):
+        return source
+    return None
+
+
+def timed_best_pick(team, n):
+    start = time.perf_counter()
+    picks = team.best_pick(n)
+    return picks, time.perf_counter() - start
+
+
+worker_league = None
+
+
+def set_worker_league(league):
+    global worker_league
+    worker_league = league
+
+
+def worker_best_pick(team_id, n):
+    picks, elapsed = timed_best_pick(worker_league.teams[team_id], n)
+    return [(player.id, value) for player, value in picks], elapsed
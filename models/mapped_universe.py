@@ -0,0 +1,134 @@
+# coding: utf8
+
+from models.projection_store import ProjectionStore
+from services.atomic_file import atomic_write
+
+import json
+import numpy as np
+import os
+import struct
+
+MAGIC = b'FFUNIVRS'
+VERSION = 1
+# magic, version, reserved, metadata length
+HEADER = struct.Struct('<8sIIQ')
+# Page aligned so every array maps onto whole pages the OS can share
+ALIGNMENT = 4096
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class MappedArray(np.memmap):
+    # Pickles as a reference to its file rather than its contents, so
+    # worker processes map the same pages instead of copying them
+    def __array_finalize__(self, obj):
+        super().__array_finalize__(obj)
+        # Views and results aren't the whole mapped array
+        self.source = None
+
+    def __reduce__(self):
+        if self.source is None:
+            return np.array(self).__reduce__()
+        return (map_array, self.source)
+
+
+def map_array(file_path, offset, dtype, shape):
+    array = MappedArray(
+        file_path, mode='r', dtype=dtype, offset=offset, shape=tuple(shape))
+    array.source = (file_path, offset, dtype, tuple(shape))
+    return array
+
+
+class MappedUniverse:
+    def __init__(self, file_path, projection_store, points, scoring_settings,
+                 injury_simulations, injury_seed):
+        self.file_path = file_path
+        self.projection_store = projection_store
+        self.points = points
+        self.scoring_settings = scoring_settings
+        self.injury_simulations = injury_simulations
+        self.injury_seed = injury_seed
+
+
+def export_universe(file_path,
+                    projection_store,
+                    points=None,
+                    scoring_settings=None,
+                    injury_simulations=None,
+                    injury_seed=None):
+    arrays = {
+        'stats': np.ascontiguousarray(projection_store.stats),
+        'positions': np.ascontiguousarray(
+            projection_store.positions.astype(str)),
+    }
+    if points is not None:
+        arrays['points'] = np.ascontiguousarray(points)
+    for position, rates in (injury_simulations or {}).items():
+        arrays[f'injury/{position}'] = np.ascontiguousarray(rates)
+
+    # Offsets are relative to the first page after the metadata
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {
+            'offset': offset,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+        }
+        offset = aligned(offset + array.nbytes)
+    metadata = json.dumps({
+        'ids': projection_store.ids,
+        'names': projection_store.names,
+        'nfl_teams': projection_store.nfl_teams,
+        'categories': projection_store.categories,
+        'scoring_settings': scoring_settings,
+        'injury_seed': injury_seed,
+        'arrays': layout,
+    }).encode('utf8')
+    data_start = aligned(HEADER.size + len(metadata))
+
+    with atomic_write(file_path) as output:
+        output.write(HEADER.pack(MAGIC, VERSION, 0, len(metadata)))
+        output.write(metadata)
+        for name, array in arrays.items():
+            output.seek(data_start + layout[name]['offset'])
+            output.write(array.tobytes())
+        output.truncate(data_start + offset)
+    return file_path
+
+
+def attach_universe(file_path):
+    file_path = os.path.abspath(file_path)
+    with open(file_path, 'rb') as universe_file:
+        magic, version, _reserved, metadata_length = HEADER.unpack(
+            universe_file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a universe file")
+        if version != VERSION:
+            raise ValueError(f"Universe version {version} is not supported")
+        metadata = json.loads(universe_file.read(metadata_length))
+    data_start = aligned(HEADER.size + metadata_length)
+    arrays = {
+        name: map_array(file_path, data_start + array['offset'],
+                        array['dtype'], array['shape'])
+        for name, array in metadata['arrays'].items()
+    }
+    projection_store = ProjectionStore(
+        ids=metadata['ids'],
+        names=metadata['names'],
+        nfl_teams=metadata['nfl_teams'],
+        positions=arrays['positions'],
+        categories=metadata['categories'],
+        stats=arrays['stats'])
+    return MappedUniverse(
+        file_path=file_path,
+        projection_store=projection_store,
+        points=arrays.get('points'),
+        scoring_settings=metadata['scoring_settings'],
+        injury_simulations={
+            name.split('/', 1)[1]: array
+            for name, array in arrays.items() if name.startswith('injury/')
+        },
+        injury_seed=metadata['injury_seed'])
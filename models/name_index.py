@@ -0,0 +1,93 @@
+# coding: utf8
+
+from collections import Counter, defaultdict
+import re
+
+
+def normalize_name(name):
+    name = re.sub(r"[^a-z0-9 ]", "", str(name).lower())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def trigrams(text, padded=True):
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    def __init__(self, names=None):
+        self.names = {}
+        self.order = {}
+        self.added = 0
+        self.exact = defaultdict(list)
+        self.trigram_index = defaultdict(set)
+        for key, name in (names or {}).items():
+            self.add(key, name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, key, name):
+        if key in self.names:
+            self.remove(key)
+        normalized = normalize_name(name)
+        self.names[key] = normalized
+        self.order[key] = self.added
+        self.added += 1
+        self.exact[normalized].append(key)
+        for trigram in trigrams(normalized):
+            self.trigram_index[trigram].add(key)
+
+    def remove(self, key):
+        normalized = self.names.pop(key)
+        self.order.pop(key)
+        self.exact[normalized].remove(key)
+        if not self.exact[normalized]:
+            del self.exact[normalized]
+        for trigram in trigrams(normalized):
+            self.trigram_index[trigram].discard(key)
+
+    def exact_match(self, name):
+        return list(self.exact.get(normalize_name(name), []))
+
+    def substring_matches(self, substring):
+        substring = normalize_name(substring)
+        inner_trigrams = trigrams(substring, padded=False)
+        if not inner_trigrams:
+            # Too short to narrow down with trigrams
+            candidates = self.names
+        else:
+            candidates = set.intersection(*[
+                self.trigram_index.get(trigram, set())
+                for trigram in inner_trigrams
+            ])
+        return [key for key in candidates if substring in self.names[key]]
+
+    def similarity(self, query, key):
+        # Best of the full name and each of its words, so a misspelled
+        # surname scores the same whatever the first name is
+        query_trigrams = trigrams(query)
+        name = self.names[key]
+        return max(
+            len(query_trigrams & name_trigrams) /
+            len(query_trigrams | name_trigrams)
+            for name_trigrams in map(trigrams, [name] + name.split()))
+
+    def search(self, query, n=10, min_similarity=0.3):
+        normalized = normalize_name(query)
+        matches = self.substring_matches(normalized)
+        if not matches:
+            # Typo tolerant fallback, any name sharing enough trigrams
+            hits = Counter()
+            for trigram in trigrams(normalized):
+                hits.update(self.trigram_index.get(trigram, ()))
+            matches = [
+                key for key in hits
+                if self.similarity(normalized, key) >= min_similarity
+            ]
+        ranked = sorted(
+            matches,
+            key=lambda key: (-self.similarity(normalized, key), self.order[key]
+                             ))
+        return ranked[:n] if n else ranked
@@ -0,0 +1,134 @@
+# coding: utf8
+
+from services.atomic_file import atomic_write
+from services.instrumentation import timed
+import json
+import numpy as np
+
+WEEKS = 16
+METADATA_KEYS = ['id', 'week', 'position', 'player', 'tm']
+SNAPSHOT_VERSION = 1
+
+
+class ProjectionStore:
+    def __init__(self, ids, names, nfl_teams, positions, categories, stats):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.nfl_teams = list(nfl_teams)
+        self.positions = np.asarray(positions)
+        self.categories = list(categories)
+        # players x weeks x categories
+        self.stats = stats
+        self.index = {player_id: row for row, player_id in enumerate(self.ids)}
+        self.category_index = {
+            category: column
+            for column, category in enumerate(self.categories)
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_projections(cls, projections, weeks=WEEKS):
+        players = {}
+        rows = []
+        categories = {}
+        for projection in projections:
+            if projection['id'] not in players:
+                players[projection['id']] = projection
+            week = int(projection['week'])
+            if not 1 <= week <= weeks:
+                continue
+            values = {}
+            for key, value in projection.items():
+                if key in METADATA_KEYS:
+                    continue
+                try:
+                    values[key] = float(value)
+                except (TypeError, ValueError):
+                    continue
+                categories.setdefault(key, len(categories))
+            rows.append((projection['id'], week, values))
+
+        ids = list(players)
+        index = {player_id: row for row, player_id in enumerate(ids)}
+        stats = np.zeros([len(ids), weeks, len(categories)])
+        for player_id, week, values in rows:
+            for key, value in values.items():
+                stats[index[player_id], week - 1, categories[key]] = value
+        return cls(
+            ids=ids,
+            names=[players[id]['player'] for id in ids],
+            nfl_teams=[players[id]['tm'] for id in ids],
+            positions=[players[id]['position'] for id in ids],
+            categories=list(categories),
+            stats=stats)
+
+    @classmethod
+    def from_frame(cls, frame, weeks=WEEKS):
+        categories = [
+            column for column in frame.columns if column not in METADATA_KEYS
+        ]
+        players = frame.drop_duplicates('id')
+        ids = players['id'].tolist()
+        index = {player_id: row for row, player_id in enumerate(ids)}
+        frame = frame[frame['week'].between(1, weeks)]
+        stats = np.zeros([len(ids), weeks, len(categories)])
+        stats[frame['id'].map(index).to_numpy(),
+              frame['week'].to_numpy(dtype=int) -
+              1] = frame[categories].to_numpy(dtype=float)
+        return cls(
+            ids=ids,
+            names=players['player'].tolist(),
+            nfl_teams=players['tm'].tolist(),
+            positions=players['position'].tolist(),
+            categories=categories,
+            stats=stats)
+
+    def save(self, file_path):
+        # Arrays plus a JSON header, readable without pickle or pandas
+        metadata = {
+            'version': SNAPSHOT_VERSION,
+            'ids': self.ids,
+            'names': self.names,
+            'nfl_teams': self.nfl_teams,
+            'categories': self.categories,
+        }
+        with atomic_write(file_path) as output:
+            np.savez(
+                output,
+                metadata=np.array(json.dumps(metadata)),
+                positions=self.positions.astype(str),
+                stats=self.stats)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as snapshot:
+            metadata = json.loads(str(snapshot['metadata']))
+            if metadata['version'] != SNAPSHOT_VERSION:
+                raise ValueError(
+                    f"Snapshot version {metadata['version']} is not supported"
+                )
+            return cls(
+                ids=metadata['ids'],
+                names=metadata['names'],
+                nfl_teams=metadata['nfl_teams'],
+                positions=snapshot['positions'],
+                categories=metadata['categories'],
+                stats=snapshot['stats'])
+
+    def scoring_vector(self, scoring_settings):
+        vector = np.zeros(len(self.categories))
+        for category, value in scoring_settings.items():
+            if category in self.category_index:
+                vector[self.category_index[category]] = value
+        return vector
+
+    @timed('ProjectionStore.weekly_points')
+    def weekly_points(self, scoring_settings):
+        # players x weeks
+        return self.stats @ self.scoring_vector(scoring_settings)
+
+    def projection(self, player_id, week):
+        row = self.index[player_id]
+        return dict(zip(self.categories, self.stats[row, week - 1]))
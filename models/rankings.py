@@ -0,0 +1,49 @@
+# coding: utf8
+
+import heapq
+
+
+class PlayerRanking:
+    def __init__(self, values, ids, positions, available_ids):
+        self.values = values
+        self.ids = ids
+        self.positions = positions
+        self.index = {player_id: row for row, player_id in enumerate(ids)}
+        self.removed = set()
+        self.heaps = {None: []}
+        self.members = {None: set()}
+        for player_id in available_ids:
+            row = self.index[player_id]
+            for key in (None, str(positions[row])):
+                self.heaps.setdefault(key, []).append(
+                    (-values[row], row, player_id))
+                self.members.setdefault(key, set()).add(player_id)
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def remove(self, player_id):
+        # Lazy deletion, stale entries are dropped when they reach the top
+        self.removed.add(player_id)
+
+    def add(self, player_id):
+        self.removed.discard(player_id)
+        row = self.index[player_id]
+        for key in (None, str(self.positions[row])):
+            if player_id not in self.members.setdefault(key, set()):
+                heapq.heappush(
+                    self.heaps.setdefault(key, []),
+                    (-self.values[row], row, player_id))
+                self.members[key].add(player_id)
+
+    def top(self, n=20, position=None):
+        heap = self.heaps.get(position, [])
+        best = []
+        while heap and len(best) < n:
+            entry = heapq.heappop(heap)
+            if entry[2] in self.removed:
+                self.members[position].discard(entry[2])
+            else:
+                best.append(entry)
+        for entry in best:
+            heapq.heappush(heap, entry)
+        return [(player_id, -value) for value, _row, player_id in best]
@@ -0,0 +1,84 @@
+# coding: utf8
+
+from collections import Counter
+from models.valuation import flex_injury_rate, start_probability
+import numpy as np
+
+
+def group_ranks(roster_points, roster_positions, candidate_points, group):
+    # Rank of each candidate against the roster in every week. Candidates
+    # are evaluated after the roster, so ties go to rostered players
+    roster_keys = np.where(
+        np.isin(roster_positions, group)[:, np.newaxis] &
+        (roster_points != 0), roster_points, 0.0)
+    return (roster_keys[np.newaxis] >=
+            candidate_points[:, np.newaxis]).sum(axis=1)
+
+
+def flex_empty(team_makeup, roster_settings):
+    if roster_settings['flex'] == 0:
+        return False
+    for position in roster_settings['flex_positions']:
+        if team_makeup[position] - 1 >= roster_settings[position]:
+            return False
+    return True
+
+
+def candidate_values(roster_points, roster_positions, candidate_points,
+                     candidate_positions, candidate_vor, injury_simulations,
+                     replacement_level, roster_settings):
+    candidate_positions = np.asarray(candidate_positions)
+    team_makeup = Counter(str(position) for position in roster_positions)
+    values = np.array(candidate_vor, dtype=float)
+    weeks = candidate_points.shape[1]
+    flex_positions = roster_settings['flex_positions']
+    roster_flex_empty = flex_empty(team_makeup, roster_settings)
+
+    for position in np.unique(candidate_positions):
+        position = str(position)
+        if team_makeup[position] < roster_settings[position]:
+            continue
+        if position in flex_positions and roster_flex_empty:
+            continue
+        rows = candidate_positions == position
+        points = candidate_points[rows]
+        week_injury_rate = injury_simulations[position]
+
+        player_rank = group_ranks(roster_points, roster_positions, points,
+                                  [position])
+        start_pct = start_probability(player_rank, roster_settings[position],
+                                      week_injury_rate)
+        if position in flex_positions and roster_settings['flex'] != 0:
+            player_rank = group_ranks(roster_points, roster_positions, points,
+                                      flex_positions)
+            total_flex_eligible_starters = sum(
+                [roster_settings[pos] for pos in flex_positions])
+            flex_pct = start_probability(
+                player_rank, total_flex_eligible_starters,
+                flex_injury_rate(injury_simulations, roster_settings))
+            start_pct = (1 - start_pct) * flex_pct + start_pct
+        values[rows] = (week_injury_rate * start_pct *
+                        (points - replacement_level[position] / weeks)).sum(
+                            axis=1)
+    return values
+
+
+def best_lineup_points(points, positions, roster_settings):
+    # points is (..., players, weeks), returns the optimal starting lineup's
+    # points per week with flex filled from the best leftover eligible players
+    positions = np.asarray(positions)
+    lineup_points = np.zeros(points.shape[:-2] + points.shape[-1:])
+    leftovers = []
+    for position in np.unique(positions):
+        position = str(position)
+        starters = roster_settings.get(position, 0)
+        position_points = -np.sort(-points[..., positions == position, :],
+                                   axis=-2)
+        lineup_points += position_points[..., :starters, :].sum(axis=-2)
+        if position in roster_settings['flex_positions']:
+            leftovers.append(position_points[..., starters:, :])
+    if roster_settings['flex'] and leftovers:
+        flex_points = -np.sort(-np.concatenate(leftovers, axis=-2), axis=-2)
+        lineup_points += flex_points[..., :roster_settings['flex'], :].sum(
+            axis=-2)
+    return lineup_points
@@ -0,0 +1,155 @@
+# coding: utf8
+
+import copy
+
+DEFAULT_SCORING_SETTINGS = {
+    # I hate spaces in keys, but this allows projection parsing
+    # to be much more elegant
+    'pass yds': 0.04,
+    'pass tds': 4.0,
+    'int': -2.0,
+    'rush yds': 0.1,
+    'rush tds': 6.0,
+    'rec': 0.0,
+    'rec yds': 0.1,
+    'rec tds': 6.0,
+    'fum': -2.0,
+}
+
+DEFAULT_ROSTER_SETTINGS = {
+    'teams': 10,
+    'roster_size': 16,
+    'defense': 1,
+    'kicker': 1,
+    'qb': 1,
+    'rb': 2,
+    'wr': 2,
+    'te': 1,
+    'flex': 1,
+    'flex_positions': ['rb', 'wr', 'te'],
+    'auction_budget': None
+}
+
+
+def merge_settings(defaults, settings=None):
+    # Common presets are defaulted, only overrides need to be passed
+    merged = copy.deepcopy(defaults)
+    for key, value in (settings or {}).items():
+        merged[key] = value
+    return merged
+
+
+def tracked(value, on_change):
+    # Lists like flex_positions are edited in place too. Always a new list,
+    # so settings never share one with the caller or another league
+    if isinstance(value, list):
+        return TrackedList(value, on_change)
+    return value
+
+
+class TrackedList(list):
+    # A list setting that reports changes to the settings holding it
+    def __init__(self, values, on_change):
+        super().__init__(values)
+        self.on_change = on_change
+
+    def __reduce__(self):
+        return (TrackedList, (list(self), self.on_change))
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.on_change()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.on_change()
+
+    def __iadd__(self, values):
+        super().__iadd__(values)
+        self.on_change()
+        return self
+
+    def __imul__(self, times):
+        super().__imul__(times)
+        self.on_change()
+        return self
+
+    def append(self, value):
+        super().append(value)
+        self.on_change()
+
+    def extend(self, values):
+        super().extend(values)
+        self.on_change()
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self.on_change()
+
+    def remove(self, value):
+        super().remove(value)
+        self.on_change()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self.on_change()
+        return value
+
+    def clear(self):
+        super().clear()
+        self.on_change()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.on_change()
+
+    def reverse(self):
+        super().reverse()
+        self.on_change()
+
+
+class TrackedSettings(dict):
+    # Reports every change so values derived from the settings go stale
+    def __init__(self, settings, on_change):
+        super().__init__({
+            key: tracked(value, on_change)
+            for key, value in dict(settings).items()
+        })
+        self.on_change = on_change
+
+    def __reduce__(self):
+        return (TrackedSettings, (dict(self), self.on_change))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, tracked(value, self.on_change))
+        self.on_change()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.on_change()
+
+    def update(self, *args, **kwargs):
+        super().update({
+            key: tracked(value, self.on_change)
+            for key, value in dict(*args, **kwargs).items()
+        })
+        self.on_change()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self.on_change()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.on_change()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.on_change()
@@ -0,0 +1,210 @@
+# coding: utf8
+
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice, repeat
+import heapq
+import numpy as np
+
+REPLACEMENT_POSITIONS = ['qb', 'wr', 'rb', 'te']
+
+
+def starter_demand(roster_settings):
+    total_bench_spots = (roster_settings['teams'] * (
+        roster_settings['roster_size'] -
+        (roster_settings['defense'] + roster_settings['kicker'] +
+         roster_settings['qb'] + roster_settings['rb'] + roster_settings['wr']
+         + roster_settings['te'] + roster_settings['flex'])))
+    starter_counts = {
+        position: roster_settings[position] * roster_settings['teams']
+        for position in REPLACEMENT_POSITIONS
+    }
+
+    # I hate hardcoding this but can't think of a better way
+    # QBs not being flexed makes it hard to assess their replacement level
+    # So I chose to replicate general roster distribution
+    starter_counts['qb'] += int(np.round(0.1 * total_bench_spots))
+    total_bench_spots = int(np.round(0.9 * total_bench_spots))
+
+    flex_demand = (
+        roster_settings['flex'] * roster_settings['teams'] + total_bench_spots)
+    return starter_counts, flex_demand
+
+
+class ReplacementIndex:
+    def __init__(self, ids, positions, season_points, roster_settings):
+        self.starter_counts, self.flex_demand = starter_demand(
+            roster_settings)
+        self.flex_positions = [
+            position for position in REPLACEMENT_POSITIONS
+            if position in roster_settings['flex_positions']
+        ]
+        self.drafted_counts = Counter()
+        self.positions = {}
+        self.keys = {}
+        # Per position lists sorted best first, keyed on
+        # (-season points, overall rank, id) so ties keep universe order
+        self.sorted_players = {
+            position: []
+            for position in REPLACEMENT_POSITIONS
+        }
+        order = np.argsort(-np.asarray(season_points), kind='stable')
+        for rank, row in enumerate(order):
+            position = str(positions[row])
+            if position not in self.sorted_players:
+                continue
+            key = (-float(season_points[row]), rank, ids[row])
+            self.positions[ids[row]] = position
+            self.keys[ids[row]] = key
+            self.sorted_players[position].append(key)
+
+    def draft(self, player_id):
+        position = self.positions.get(player_id)
+        if position is None:
+            return
+        players = self.sorted_players[position]
+        key = self.keys[player_id]
+        index = bisect_left(players, key)
+        if index < len(players) and players[index] == key:
+            players.pop(index)
+            self.drafted_counts[position] += 1
+
+    def release(self, player_id):
+        position = self.positions.get(player_id)
+        if position is None:
+            return
+        players = self.sorted_players[position]
+        key = self.keys[player_id]
+        index = bisect_left(players, key)
+        if index == len(players) or players[index] != key:
+            insort(players, key)
+            self.drafted_counts[position] -= 1
+
+    def remaining_demand(self):
+        starters = {}
+        flex_overflow = 0
+        for position, count in self.starter_counts.items():
+            drafted = self.drafted_counts[position]
+            starters[position] = max(count - drafted, 0)
+            if position in self.flex_positions:
+                flex_overflow += max(drafted - count, 0)
+        return starters, max(self.flex_demand - flex_overflow, 0)
+
+    def levels(self):
+        starters, flex_demand = self.remaining_demand()
+        flex_candidates = []
+        for position in self.flex_positions:
+            flex_candidates.append(
+                zip(
+                    islice(self.sorted_players[position], starters[position],
+                           None), repeat(position)))
+        flex_taken = Counter(
+            position for _key, position in islice(
+                heapq.merge(*flex_candidates), flex_demand))
+
+        replacement_level = {}
+        for position in REPLACEMENT_POSITIONS:
+            players = self.sorted_players[position]
+            index = starters[position] + flex_taken[position]
+            # Once the pool runs out the replacement is an empty slot
+            replacement_level[position] = (-players[index][0]
+                                           if index < len(players) else 0)
+        return replacement_level
+
+
+def weekly_ranks(points, positions, group):
+    # Rank of every player in each week when only players in group with a
+    # projection count, matching a stable descending sort of the universe
+    in_group = np.isin(positions, group)
+    keys = np.where(in_group[:, np.newaxis] & (points != 0), points, 0.0)
+    order = np.argsort(-keys, axis=0, kind='stable')
+    ranks = np.empty(order.shape, dtype=int)
+    np.put_along_axis(
+        ranks, order, np.arange(len(points))[:, np.newaxis], axis=0)
+    return ranks
+
+
+def weekly_rank_tables(points, positions, flex_positions):
+    position_ranks = np.zeros(points.shape, dtype=int)
+    for position in np.unique(positions):
+        rows = positions == position
+        position_ranks[rows] = weekly_ranks(points, positions,
+                                            [position])[rows]
+    flex_ranks = weekly_ranks(points, positions, flex_positions)
+    return position_ranks, flex_ranks
+
+
+def start_probability(rank, starters, injury_rate):
+    # Probability that few enough players ahead get hurt to prevent
+    # player from starting, only evaluated where the player isn't a starter
+    rank, starters, injury_rate = np.broadcast_arrays(rank, starters,
+                                                      injury_rate)
+    probability = np.ones(rank.shape)
+    benched = rank >= starters
+    # bdtr is the binomial CDF ufunc, without scipy.stats' per call overhead.
+    # Imported here so loading a league doesn't load scipy up front
+    from scipy.special import bdtr
+    probability[benched] = 1 - bdtr(rank[benched] - starters[benched],
+                                    rank[benched], injury_rate[benched])
+    return probability
+
+
+def flex_injury_rate(injury_simulations, roster_settings):
+    return np.average(
+        [
+            injury_simulations[position]
+            for position in roster_settings['flex_positions']
+        ],
+        axis=0,
+        weights=[
+            roster_settings[position]
+            for position in roster_settings['flex_positions']
+        ])
+
+
+def independent_start_pcts(rank_tables, positions, injury_simulations,
+                           roster_settings):
+    position_ranks, flex_ranks = rank_tables
+    teams = roster_settings['teams']
+    weeks = position_ranks.shape[1]
+    injury_rates = np.array([
+        injury_simulations.get(position, np.zeros(weeks))
+        for position in positions
+    ]).reshape(position_ranks.shape)
+    starters = np.array([
+        roster_settings.get(position, 0) * teams for position in positions
+    ])
+    start_pcts = start_probability(position_ranks, starters[:, np.newaxis],
+                                   injury_rates)
+    flex_rows = np.isin(positions, roster_settings['flex_positions'])
+    if roster_settings['flex'] == 0 or not flex_rows.any():
+        return start_pcts
+
+    total_flex_eligible_starters = sum([
+        roster_settings[position]
+        for position in roster_settings['flex_positions']
+    ]) * teams
+    flex_pct = start_probability(
+        flex_ranks[flex_rows], total_flex_eligible_starters,
+        flex_injury_rate(injury_simulations, roster_settings))
+    non_flex_pct = start_pcts[flex_rows]
+    start_pcts[flex_rows] = (1 - non_flex_pct) * flex_pct + non_flex_pct
+    return start_pcts
+
+
+def values_over_replacement(points, positions, injury_simulations,
+                            replacement_level, start_pcts=None):
+    weeks = points.shape[1]
+    position_injury = np.array([
+        injury_simulations.get(position, np.zeros(weeks))
+        for position in positions
+    ]).reshape(points.shape)
+    weekly_rep_level = np.array([
+        replacement_level.get(position, 0.0) for position in positions
+    ]) / weeks
+    player_weekly_values = (1 - position_injury) * (
+        points - weekly_rep_level[:, np.newaxis])
+    if start_pcts is not None:
+        player_weekly_values *= start_pcts
+    player_weekly_values[player_weekly_values < 0] = 0
+    return player_weekly_values.sum(axis=1)
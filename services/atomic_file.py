@@ -0,0 +1,25 @@
+# coding: utf8
+
+from contextlib import contextmanager
+
+import os
+import threading
+
+
+@contextmanager
+def atomic_write(file_path, mode='wb', fsync=False):
+    # Written beside the target then renamed over it, so readers only ever
+    # see a whole file. A failed write leaves neither file nor temp behind
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, mode) as output:
+            yield output
+            if fsync:
+                output.flush()
+                os.fsync(output.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,295 @@
+# coding: utf8
+
+from models.league import League
+from models.mapped_universe import attach_universe
+from models.projection_store import ProjectionStore
+from models.roster_value import candidate_values
+from models.settings import (DEFAULT_ROSTER_SETTINGS, DEFAULT_SCORING_SETTINGS,
+                             merge_settings)
+from services.draft_simulator import DraftState
+from services.instrumentation import instrumentation
+
+import argparse
+import asyncio
+import itertools
+import json
+import numpy as np
+import threading
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+
+class DraftTemplate:
+    # Everything a draft reads but never writes, shared by every draft with
+    # the same settings
+    def __init__(self, league):
+        store = league.projection_store
+        self.ids = store.ids
+        self.index = store.index
+        self.names = store.names
+        self.nfl_teams = store.nfl_teams
+        self.roster_settings = dict(league.roster_settings)
+        self.state = DraftState(league)
+        self.auction_vor = (league.values_over_replacement(auction=True)
+                            if self.roster_settings['auction_budget'] else
+                            None)
+        self.order = np.argsort(-self.state.values, kind='stable')
+        self.auction_order = (np.argsort(-self.auction_vor, kind='stable')
+                              if self.auction_vor is not None else None)
+        for array in (self.state.points, self.state.values, self.order,
+                      self.auction_vor, self.auction_order):
+            if array is not None:
+                array.setflags(write=False)
+
+    def player(self, row, value):
+        return {
+            'id': self.ids[row],
+            'name': self.names[row],
+            'position': str(self.state.positions[row]),
+            'nfl_team': self.nfl_teams[row],
+            'value': float(value),
+        }
+
+
+class DraftUniverse:
+    # One projection store for every hosted draft. Scoring and rosters only
+    # add a template per distinct set of settings
+    def __init__(self, projection_store, injury_seed=None):
+        self.projection_store = projection_store
+        self.injury_seed = injury_seed
+        self.templates = {}
+        self.lock = threading.Lock()
+
+    def template(self, scoring_settings=None, roster_settings=None):
+        scoring_settings = merge_settings(DEFAULT_SCORING_SETTINGS,
+                                          scoring_settings)
+        roster_settings = merge_settings(DEFAULT_ROSTER_SETTINGS,
+                                         roster_settings)
+        key = json.dumps([scoring_settings, roster_settings], sort_keys=True)
+        with self.lock:
+            if key not in self.templates:
+                self.templates[key] = DraftTemplate(
+                    League(
+                        'draft_server',
+                        scoring_settings=scoring_settings,
+                        roster_settings=roster_settings,
+                        projection_source=self.projection_store,
+                        injury_seed=self.injury_seed))
+            return self.templates[key]
+
+
+class DraftSession:
+    # Copy on write overlay, a draft only owns its availability, rosters
+    # and budgets
+    def __init__(self, template):
+        self.template = template
+        self.state = template.state.clone()
+        self.spent = np.zeros(self.state.teams)
+
+    @property
+    def roster_settings(self):
+        return self.template.roster_settings
+
+    def row(self, player_id):
+        if player_id not in self.template.index:
+            raise KeyError(f"Player with id {player_id} not found")
+        return self.template.index[player_id]
+
+    def check_team(self, team):
+        if not isinstance(team, int) or not 0 <= team < self.state.teams:
+            raise KeyError(f"Team {team} not found")
+
+    def pick(self, team, player_id, price=None):
+        self.check_team(team)
+        if len(self.state.rosters[team]) >= self.state.rounds:
+            raise ValueError(f"Team {team} roster is already full")
+        self.state.pick(team, self.row(player_id))
+        if price:
+            self.spent[team] += price
+        return self.roster(team)
+
+    def auction_scale(self):
+        budget_available = (
+            (self.roster_settings['auction_budget'] -
+             self.roster_settings['defense'] - self.roster_settings['kicker'])
+            * self.state.teams - self.spent.sum())
+        value_available = self.template.auction_vor[self.state.available].sum()
+        return budget_available / value_available
+
+    def best_available(self, n=20, position=None, auction=False):
+        # Walks the shared ranking, so a draft never keeps one of its own
+        if auction and self.template.auction_vor is None:
+            raise ValueError("Draft has no auction budget")
+        order = self.template.auction_order if auction else self.template.order
+        rows = order[self.state.available[order]]
+        if position:
+            rows = rows[self.state.positions[rows] == position]
+        rows = rows[:n]
+        if auction:
+            values = self.template.auction_vor[rows] * self.auction_scale()
+        else:
+            values = self.state.values[rows]
+        return [
+            self.template.player(row, value)
+            for row, value in zip(rows, values)
+        ]
+
+    def best_pick(self, team, n=5):
+        self.check_team(team)
+        roster = self.state.rosters[team]
+        candidates, = np.nonzero(self.state.available)
+        added_value = candidate_values(
+            roster_points=self.state.points[roster],
+            roster_positions=self.state.positions[roster],
+            candidate_points=self.state.points[candidates],
+            candidate_positions=self.state.positions[candidates],
+            candidate_vor=self.state.values[candidates],
+            injury_simulations=self.state.injury_simulations,
+            replacement_level=self.state.replacement_level,
+            roster_settings=self.state.roster_settings)
+        top = np.argsort(-added_value, kind='stable')[:n]
+        return [
+            self.template.player(candidates[index], added_value[index])
+            for index in top
+        ]
+
+    def roster(self, team):
+        self.check_team(team)
+        return [
+            self.template.player(row, self.state.values[row])
+            for row in self.state.rosters[team]
+        ]
+
+    def summary(self):
+        return {
+            'teams': self.state.teams,
+            'picks': sum(len(roster) for roster in self.state.rosters),
+            'spent': self.spent.tolist(),
+        }
+
+
+class DraftServer:
+    def __init__(self, universe):
+        self.universe = universe
+        self.drafts = {}
+        self.draft_ids = itertools.count(1)
+
+    async def create(self,
+                     draft_id=None,
+                     scoring_settings=None,
+                     roster_settings=None):
+        # The first draft with new settings builds its template off the
+        # event loop so other drafts keep answering
+        template = await asyncio.to_thread(
+            self.universe.template, scoring_settings, roster_settings)
+        draft_id = str(draft_id or next(self.draft_ids))
+        if draft_id in self.drafts:
+            raise ValueError(f"Draft {draft_id} already exists")
+        self.drafts[draft_id] = DraftSession(template)
+        return {'draft': draft_id, **self.drafts[draft_id].summary()}
+
+    def draft(self, draft_id):
+        if str(draft_id) not in self.drafts:
+            raise KeyError(f"Draft {draft_id} not found")
+        return self.drafts[str(draft_id)]
+
+    async def handle(self, request):
+        # One JSON request in, one JSON response out. Everything but create
+        # runs inline, so a draft's requests apply in the order received
+        with instrumentation.stage(f"DraftServer.{request.get('op')}"):
+            return await self.dispatch(request)
+
+    async def dispatch(self, request):
+        try:
+            op = request.get('op')
+            if op == 'create':
+                result = await self.create(request.get('draft'),
+                                           request.get('scoring_settings'),
+                                           request.get('roster_settings'))
+            elif op == 'pick':
+                result = self.draft(request['draft']).pick(
+                    request['team'], request['player_id'],
+                    request.get('price'))
+            elif op == 'best_available':
+                result = self.draft(request['draft']).best_available(
+                    request.get('n', 20), request.get('position'),
+                    request.get('auction', False))
+            elif op == 'best_pick':
+                result = self.draft(request['draft']).best_pick(
+                    request['team'], request.get('n', 5))
+            elif op == 'roster':
+                result = self.draft(request['draft']).roster(request['team'])
+            elif op == 'state':
+                result = self.draft(request['draft']).summary()
+            elif op == 'close':
+                self.drafts.pop(str(request['draft']), None)
+                result = None
+            else:
+                raise KeyError(f"Invalid op {op}")
+        except (KeyError, ValueError, TypeError) as error:
+            # KeyError's str() quotes the message, args[0] doesn't
+            return {
+                'id': request.get('id'),
+                'ok': False,
+                'error': str(error.args[0] if error.args else error)
+            }
+        return {'id': request.get('id'), 'ok': True, 'result': result}
+
+    async def respond(self, message):
+        try:
+            request = json.loads(message)
+        except ValueError as error:
+            return json.dumps({'ok': False, 'error': str(error)})
+        if not isinstance(request, dict):
+            return json.dumps({'ok': False, 'error': "Request must be an object"})
+        return json.dumps(await self.handle(request))
+
+    async def handle_stream(self, reader, writer):
+        # Newline delimited JSON
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write((await self.respond(line)).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle_websocket(self, websocket, *_path):
+        async for message in websocket:
+            await websocket.send(await self.respond(message))
+
+    async def serve_tcp(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle_stream, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_websocket(self, host=HOST, port=PORT):
+        # websockets is optional, only needed for this transport
+        import websockets
+        async with websockets.serve(self.handle_websocket, host, port):
+            await asyncio.Future()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Host many drafts on one shared projection universe")
+    parser.add_argument('--snapshot', required=True,
+                        help="projection snapshot written by ProjectionStore.save"
+                        " or a universe written by League.export_universe")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--websocket', action='store_true')
+    parser.add_argument('--injury-seed', type=int)
+    arguments = parser.parse_args()
+
+    if arguments.snapshot.endswith('.universe'):
+        projection_store = attach_universe(arguments.snapshot).projection_store
+    else:
+        projection_store = ProjectionStore.load(arguments.snapshot)
+    server = DraftServer(
+        DraftUniverse(projection_store, injury_seed=arguments.injury_seed))
+    serve = server.serve_websocket if arguments.websocket else server.serve_tcp
+    asyncio.run(serve(arguments.host, arguments.port))
@@ -0,0 +1,200 @@
+# coding: utf8
+
+from concurrent.futures import ProcessPoolExecutor
+from models.roster_value import best_lineup_points, candidate_values
+from services.instrumentation import timed
+
+import numpy as np
+import time
+
+
+def position_limits(roster_settings):
+    # Keep simulated opponents from hoarding one position
+    bench_spots = (roster_settings['roster_size'] - sum([
+        roster_settings[setting]
+        for setting in ['defense', 'kicker', 'qb', 'rb', 'wr', 'te', 'flex']
+    ]))
+    return {
+        position: roster_settings[position] +
+        (roster_settings['flex']
+         if position in roster_settings['flex_positions'] else 0) +
+        bench_spots // 2
+        for position in ['qb', 'rb', 'wr', 'te']
+    }
+
+
+class DraftState:
+    def __init__(self, league):
+        self.points = league.points_matrix
+        self.positions = league.projection_store.positions
+        self.values = league.values_over_replacement()
+        self.injury_simulations = league.injury_simulations
+        self.replacement_level = league.replacement_level
+        self.roster_settings = league.roster_settings
+        self.teams = league.roster_settings['teams']
+        self.rounds = (league.roster_settings['roster_size'] -
+                       league.roster_settings['kicker'] -
+                       league.roster_settings['defense'])
+        limits = position_limits(league.roster_settings)
+        position_names, self.position_codes = np.unique(
+            self.positions, return_inverse=True)
+        self.position_limits = np.array([
+            limits.get(str(position), league.roster_settings['roster_size'])
+            for position in position_names
+        ])
+        self.reset()
+
+    def reset(self):
+        self.available = np.ones(len(self.positions), dtype=bool)
+        self.rosters = [[] for _team in range(self.teams)]
+        self.position_counts = np.zeros(
+            [self.teams, len(self.position_limits)], dtype=int)
+        return self
+
+    def clone(self):
+        # Shares the read only league arrays, copies only the draft state
+        clone = object.__new__(DraftState)
+        clone.__dict__.update(self.__dict__)
+        clone.available = self.available.copy()
+        clone.rosters = [list(roster) for roster in self.rosters]
+        clone.position_counts = self.position_counts.copy()
+        return clone
+
+    def pick(self, team, row):
+        if not self.available[row]:
+            raise KeyError(f"Player row {row} is not available")
+        self.available[row] = False
+        self.rosters[team].append(row)
+        self.position_counts[team, self.position_codes[row]] += 1
+
+    def allowed(self, team):
+        full = self.position_counts[team] >= self.position_limits
+        return self.available & ~full[self.position_codes]
+
+    def pick_order(self):
+        # Snake draft
+        for draft_round in range(self.rounds):
+            teams = range(self.teams)
+            yield from (reversed(teams) if draft_round % 2 else teams)
+
+    def season_points(self, team):
+        roster = self.rosters[team]
+        return best_lineup_points(self.points[roster], self.positions[roster],
+                                  self.roster_settings).sum()
+
+
+def best_available_strategy(state, team, rng):
+    values = np.where(state.available, state.values, -np.inf)
+    return int(np.argmax(values))
+
+
+def best_pick_strategy(state, team, rng):
+    roster = state.rosters[team]
+    candidates, = np.nonzero(state.available)
+    values = candidate_values(
+        roster_points=state.points[roster],
+        roster_positions=state.positions[roster],
+        candidate_points=state.points[candidates],
+        candidate_positions=state.positions[candidates],
+        candidate_vor=state.values[candidates],
+        injury_simulations=state.injury_simulations,
+        replacement_level=state.replacement_level,
+        roster_settings=state.roster_settings)
+    return int(candidates[np.argmax(values)])
+
+
+def simulate_draft(state, team, strategy, rng, noise=0.2):
+    state.reset()
+    # Every opponent drafts off their own noisy board for the whole draft
+    boards = state.values + noise * state.values.std() * rng.standard_normal(
+        (state.teams, len(state.values)))
+    for picking_team in state.pick_order():
+        if picking_team == team:
+            row = strategy(state, team, rng)
+        else:
+            row = int(
+                np.argmax(
+                    np.where(
+                        state.allowed(picking_team), boards[picking_team],
+                        -np.inf)))
+        state.pick(picking_team, row)
+    return state.season_points(team)
+
+
+def simulate_chunk(state, team, strategies, seeds, noise):
+    results = {name: [] for name in strategies}
+    for seed in seeds:
+        for name, strategy in strategies.items():
+            # Same seed for every strategy so they face the same opponents
+            rng = np.random.default_rng(seed)
+            results[name].append(
+                simulate_draft(state, team, strategy, rng, noise=noise))
+    return results
+
+
+worker_state = None
+
+
+def set_worker_state(state):
+    global worker_state
+    worker_state = state
+
+
+def worker_simulate_chunk(team, strategies, seeds, noise):
+    return simulate_chunk(worker_state, team, strategies, seeds, noise)
+
+
+def summarize(season_points):
+    season_points = np.asarray(season_points)
+    return {
+        'mean': season_points.mean(),
+        'std': season_points.std(),
+        'p10': np.percentile(season_points, 10),
+        'p50': np.percentile(season_points, 50),
+        'p90': np.percentile(season_points, 90),
+        'season_points': season_points,
+    }
+
+
+@timed('draft_simulator.simulate_drafts')
+def simulate_drafts(league,
+                    team,
+                    strategies=None,
+                    simulations=1000,
+                    noise=0.2,
+                    seed=None,
+                    processes=None,
+                    chunk_size=50):
+    strategies = strategies or {
+        'best_pick': best_pick_strategy,
+        'best_available': best_available_strategy,
+    }
+    state = DraftState(league)
+    seeds = np.random.SeedSequence(seed).generate_state(simulations)
+    chunks = [
+        seeds[start:start + chunk_size]
+        for start in range(0, simulations, chunk_size)
+    ]
+    start = time.perf_counter()
+    if processes:
+        with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=set_worker_state,
+                initargs=(state, )) as pool:
+            chunk_results = list(
+                pool.map(worker_simulate_chunk, [team] * len(chunks),
+                         [strategies] * len(chunks), chunks,
+                         [noise] * len(chunks)))
+    else:
+        chunk_results = [
+            simulate_chunk(state.clone(), team, strategies, chunk, noise)
+            for chunk in chunks
+        ]
+    report = {
+        name: summarize([
+            points for chunk in chunk_results for points in chunk[name]
+        ])
+        for name in strategies
+    }
+    report['elapsed'] = time.perf_counter() - start
+    return report
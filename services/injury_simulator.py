@@ -0,0 +1,103 @@
+# coding: utf8
+
+from definitions import ROOT_DIR
+from services.atomic_file import atomic_write
+from services.instrumentation import instrumentation, timed
+
+import hashlib
+import json
+import numpy as np
+import os
+
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'injuries')
+# Bump when the simulation changes so old cached rates aren't reused
+CACHE_VERSION = 2
+# Obtained from
+# http://www.profootballlogic.com/articles/nfl-injury-rate-analysis/
+# Poisson probably isn't perfect here, distribution is likely bimodal
+# Where season ending injuries are the second mode
+# This feels close enough
+INJURY_STATS = {
+    'rb': {
+        'likelihood': 0.051,
+        'duration_mean': 3.9,
+    },
+    'wr': {
+        'likelihood': .045,
+        'duration_mean': 3.2
+    },
+    'qb': {
+        'likelihood': .025,
+        'duration_mean': 3.1
+    },
+    'te': {
+        'likelihood': .049,
+        'duration_mean': 2.6
+    }
+}
+INJURY_SIMULATIONS = 10000
+
+
+def simulate_injury_weeks(likelihood, duration_mean, simulations=10000,
+                          weeks=16, rng=None):
+    # likelihood and duration_mean may be per player arrays, giving
+    # simulations x players x weeks injury paths
+    rng = rng if rng is not None else np.random.default_rng()
+    shape = (simulations, ) + np.broadcast(likelihood, duration_mean).shape
+    duration_mean = np.broadcast_to(duration_mean, shape)
+    injury_weeks = np.zeros(shape + (weeks, ), dtype=bool)
+    weeks_remaining = np.zeros(shape, dtype=int)
+    for week in range(weeks):
+        # Only healthy players can pick up a new injury, same as drawing
+        # once per healthy week in each simulation. Lengths are only drawn
+        # for the few that do
+        new_injuries = (weeks_remaining == 0) & (rng.random(shape) <=
+                                                 likelihood)
+        weeks_remaining[new_injuries] = rng.poisson(
+            duration_mean[new_injuries])
+        injury_weeks[..., week] = weeks_remaining > 0
+        weeks_remaining = np.maximum(weeks_remaining - 1, 0)
+    return injury_weeks
+
+
+def cache_key(injury_stats, simulations, weeks, seed):
+    payload = json.dumps(
+        {
+            'injury_stats': injury_stats,
+            'simulations': simulations,
+            'weeks': weeks,
+            'seed': seed,
+            'version': CACHE_VERSION
+        },
+        sort_keys=True)
+    return hashlib.sha1(payload.encode('utf8')).hexdigest()
+
+
+@timed('injury_simulator.simulate_injury_rates')
+def simulate_injury_rates(injury_stats,
+                          simulations=10000,
+                          weeks=16,
+                          seed=None,
+                          use_cache=True):
+    key = cache_key(injury_stats, simulations, weeks, seed)
+    file_path = os.path.join(CACHE_DIR, f"{key}.npz")
+    instrumentation.cache('injury_simulator.rates', use_cache
+                          and os.path.exists(file_path))
+    if use_cache and os.path.exists(file_path):
+        with np.load(file_path) as cached:
+            return {position: cached[position] for position in injury_stats}
+
+    rng = np.random.default_rng(seed)
+    injury_rates = {
+        position: simulate_injury_weeks(
+            injury_stat['likelihood'],
+            injury_stat['duration_mean'],
+            simulations=simulations,
+            weeks=weeks,
+            rng=rng).mean(axis=0)
+        for position, injury_stat in injury_stats.items()
+    }
+    if use_cache:
+        with atomic_write(file_path) as output:
+            np.savez(output, **injury_rates)
+    return injury_rates
@@ -0,0 +1,124 @@
+# coding: utf8
+
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import json
+import os
+import time
+
+MAX_RECORDS = 100000
+
+
+class Instrumentation:
+    # Process wide timings, call counts and cache counters. Off by default,
+    # the only cost while disabled is a flag check per instrumented call
+    def __init__(self, enabled=False, max_records=MAX_RECORDS):
+        self.enabled = enabled
+        self.records = deque(maxlen=max_records)
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.timings = {}
+        self.caches = {}
+        self.records.clear()
+
+    def add_timing(self, stage, started, start):
+        seconds = time.perf_counter() - start
+        timing = self.timings.get(stage)
+        if timing is None:
+            timing = self.timings[stage] = {
+                'calls': 0,
+                'seconds': 0.0,
+                'max_seconds': 0.0
+            }
+        timing['calls'] += 1
+        timing['seconds'] += seconds
+        timing['max_seconds'] = max(timing['max_seconds'], seconds)
+        self.records.append({
+            'type': 'timing',
+            'stage': stage,
+            'time': started,
+            'seconds': seconds
+        })
+
+    def cache(self, name, hit):
+        if not self.enabled:
+            return
+        counter = self.caches.get(name)
+        if counter is None:
+            counter = self.caches[name] = {'hits': 0, 'misses': 0}
+        counter['hits' if hit else 'misses'] += 1
+        self.records.append({
+            'type': 'cache',
+            'stage': name,
+            'time': time.time(),
+            'hit': hit
+        })
+
+    @contextmanager
+    def stage(self, stage):
+        if not self.enabled:
+            yield
+            return
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(stage, started, start)
+
+    def report(self):
+        return {
+            'timings': {
+                stage: dict(timing,
+                            mean_seconds=timing['seconds'] / timing['calls'])
+                for stage, timing in sorted(
+                    self.timings.items(),
+                    key=lambda item: -item[1]['seconds'])
+            },
+            'caches': {
+                name: dict(counter,
+                           hit_rate=counter['hits'] /
+                           (counter['hits'] + counter['misses']))
+                for name, counter in sorted(self.caches.items())
+            },
+        }
+
+    def export_records(self, file_path):
+        # JSON lines, one record per timed call or cache lookup
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)),
+                    exist_ok=True)
+        with open(file_path, 'w') as output:
+            for record in self.records:
+                output.write(json.dumps(record) + '\n')
+        return file_path
+
+
+instrumentation = Instrumentation(
+    enabled=bool(os.environ.get('FANTASY_FOOTBALL_PERF')))
+
+
+def timed(stage):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return function(*args, **kwargs)
+            started = time.time()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                instrumentation.add_timing(stage, started, start)
+
+        return wrapper
+
+    return decorator
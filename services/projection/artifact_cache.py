@@ -0,0 +1,59 @@
+from definitions import ROOT_DIR
+from services.atomic_file import atomic_write
+
+import dill
+import hashlib
+import json
+import os
+import pandas as pd
+
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'models')
+MAX_ENTRIES = 5
+
+
+def artifact_key(model_df, targets, hyperparameters):
+    digest = hashlib.sha1()
+    digest.update(
+        pd.util.hash_pandas_object(model_df, index=True).values.tobytes())
+    digest.update(",".join(model_df.columns).encode('utf8'))
+    digest.update(
+        json.dumps(
+            {
+                'targets': targets,
+                'hyperparameters': hyperparameters
+            },
+            sort_keys=True,
+            default=str).encode('utf8'))
+    return digest.hexdigest()
+
+
+def artifact_path(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{key}.pkl")
+
+
+def load_artifact(key, cache_dir=CACHE_DIR):
+    file_path = artifact_path(key, cache_dir)
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'rb') as saved_artifact:
+        artifact = dill.load(saved_artifact)
+    # Touch on read so eviction drops the least recently used artifacts
+    os.utime(file_path)
+    return artifact
+
+
+def save_artifact(key, artifact, cache_dir=CACHE_DIR,
+                  max_entries=MAX_ENTRIES):
+    with atomic_write(artifact_path(key, cache_dir)) as output:
+        dill.dump(artifact, output)
+    evict(cache_dir, max_entries)
+
+
+def evict(cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+    artifacts = sorted(
+        (os.path.join(cache_dir, filename)
+         for filename in os.listdir(cache_dir) if filename.endswith('.pkl')),
+        key=os.path.getmtime,
+        reverse=True)
+    for file_path in artifacts[max_entries:]:
+        os.remove(file_path)
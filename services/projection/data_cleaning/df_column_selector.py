@@ -9,4 +9,4 @@ class DfColumnSelector(TransformerMixin):
         return self
     
     def transform(self, x):
-        return x[self.column_name].values.reshape(-1,1)
\ No newline at end of file
+        return x[self.column_name].to_numpy().reshape(-1,1)
\ No newline at end of file
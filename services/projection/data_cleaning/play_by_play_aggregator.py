@@ -1,17 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+from definitions import ROOT_DIR
+from itertools import repeat
+from services.atomic_file import atomic_write
+from services.instrumentation import instrumentation, timed
+
+import hashlib
 import os
 import pandas as pd
 
+CACHE_DIR = os.path.join(ROOT_DIR, "cache", "play_by_play")
+CHUNKSIZE = 100000
+GROUP_COLUMNS = ["GameID", "posteam", "DefensiveTeam", "OffenseIsHome"]
+SUM_COLUMNS = ["PassAttempt", "RushAttempt", "CompletePass", "PassTD", "RushTD", "RushYards", "PassYards",
+               "InterceptionThrown"]
+TEAM_COLUMNS = ["posteam", "DefensiveTeam", "HomeTeam"]
+# Only the columns the model uses, with compact dtypes
+DTYPES = {
+    "GameID": "int64",
+    "posteam": "category",
+    "DefensiveTeam": "category",
+    "HomeTeam": "category",
+    "PlayType": "category",
+    "PassOutcome": "category",
+    "Passer": "category",
+    "Rusher": "category",
+    "PassAttempt": "boolean",
+    "RushAttempt": "boolean",
+    "Touchdown": "boolean",
+    "InterceptionThrown": "boolean",
+    "EPA": "float32",
+    "Yards.Gained": "float32",
+}
+
 
 class PlayByPlayAggregator:
     @staticmethod
-    def read_file(filename=None):
+    def file_path(filename=None):
         if not filename:
             filename = "pbpdata.csv"
-        return pd.read_csv(os.path.join(os.path.dirname(os.path.realpath(__file__)), filename))
+        return os.path.join(os.path.dirname(os.path.realpath(__file__)), filename)
+
+    @classmethod
+    def read_file(cls, filename=None, **kwargs):
+        reader = pd.read_csv(cls.file_path(filename), usecols=list(DTYPES), dtype=DTYPES, **kwargs)
+        if "chunksize" in kwargs:
+            return (cls.share_team_categories(chunk) for chunk in reader)
+        return cls.share_team_categories(reader)
+
+    @staticmethod
+    def share_team_categories(df):
+        # Team columns are compared with each other, so they need identical categories
+        teams = sorted(set().union(*[df[column].cat.categories for column in TEAM_COLUMNS]))
+        for column in TEAM_COLUMNS:
+            df[column] = df[column].cat.set_categories(teams)
+        return df
 
     @classmethod
-    def prepare_columns(cls):
-        df = cls.read_file()
+    def prepare_columns(cls, df=None):
+        df = cls.read_file() if df is None else df
         df["CompletePass"] = df["PassOutcome"] == "Complete"
         df["OffensiveTouchdown"] = (df["Touchdown"]) & (df["EPA"] > 0)
         df["PassAttempt"] = df["PassAttempt"] & df["Passer"].notnull() & (df["PlayType"] != "No Play")
@@ -23,12 +69,90 @@ class PlayByPlayAggregator:
         df["PassYards"] = df["Yards.Gained"] * df["PassAttempt"]
         return df
 
+    @staticmethod
+    def sum_by_game(df):
+        return df.groupby(GROUP_COLUMNS, observed=True)[SUM_COLUMNS].sum()
+
+    @staticmethod
+    def merge_sums(*game_sums):
+        return pd.concat(game_sums).groupby(level=GROUP_COLUMNS, observed=True).sum()
+
     @classmethod
-    def aggregate(cls):
-        df = cls.prepare_columns()
-        model_df = df.groupby(["GameID", "posteam", "DefensiveTeam", "OffenseIsHome"]).sum().reset_index()[
-            ["GameID", "posteam", "DefensiveTeam", "OffenseIsHome", "PassAttempt", "RushAttempt", "CompletePass", 
-            "PassTD", "RushTD", "RushYards", "PassYards", "InterceptionThrown"]].rename(
-                columns={"posteam": "Offense"})
+    def sum_file_in_chunks(cls, filename, chunksize=CHUNKSIZE):
+        # Fold each chunk into the running per-game sums, so memory is bounded by the
+        # number of games rather than the number of plays
+        game_sums = None
+        for chunk in cls.read_file(filename, chunksize=chunksize):
+            chunk_sums = cls.sum_by_game(cls.prepare_columns(chunk))
+            game_sums = chunk_sums if game_sums is None else cls.merge_sums(game_sums, chunk_sums)
+        return game_sums
+
+    @staticmethod
+    def finalize(game_sums):
+        model_df = game_sums.reset_index().rename(columns={"posteam": "Offense"})
+        for column in ["Offense", "DefensiveTeam"]:
+            model_df[column] = model_df[column].astype(str)
+        model_df["OffenseIsHome"] = model_df["OffenseIsHome"].astype(bool)
+        for column in SUM_COLUMNS:
+            model_df[column] = model_df[column].astype(float if "Yards" in column else int)
         model_df["CompletePct"] = model_df["CompletePass"] / model_df["PassAttempt"]
-        return model_df
\ No newline at end of file
+        return model_df
+
+    @classmethod
+    def cache_path(cls, filename=None):
+        file_path = os.path.abspath(cls.file_path(filename))
+        source = os.stat(file_path)
+        # Same named files in different directories get their own entries
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        path_hash = hashlib.sha1(file_path.encode("utf8")).hexdigest()[:12]
+        return os.path.join(
+            CACHE_DIR, f"{name}_{path_hash}-{source.st_size}-{source.st_mtime_ns}.feather")
+
+    @classmethod
+    def read_cache(cls, filename=None):
+        cache_path = cls.cache_path(filename)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            return pd.read_feather(cache_path)
+        except ImportError:
+            return None
+
+    @classmethod
+    def write_cache(cls, model_df, filename=None):
+        cache_path = cls.cache_path(filename)
+        try:
+            with atomic_write(cache_path) as output:
+                model_df.to_feather(output)
+        except ImportError:
+            # Feather needs pyarrow, without it we just skip the cache
+            return
+        # Anything else cached for this source is stale now. Other
+        # processes' in flight temp files aren't ours to remove
+        prefix = os.path.basename(cache_path).rsplit("-", 2)[0]
+        for cached in os.listdir(CACHE_DIR):
+            if (cached.endswith(".feather") and cached.rsplit("-", 2)[0] == prefix
+                    and cached != os.path.basename(cache_path)):
+                os.remove(os.path.join(CACHE_DIR, cached))
+
+    @classmethod
+    @timed("PlayByPlayAggregator.aggregate")
+    def aggregate(cls, filename=None, use_cache=True):
+        model_df = cls.read_cache(filename) if use_cache else None
+        instrumentation.cache("PlayByPlayAggregator.model_df", model_df is not None)
+        if model_df is None:
+            df = cls.prepare_columns(cls.read_file(filename))
+            model_df = cls.finalize(cls.sum_by_game(df))
+            if use_cache:
+                cls.write_cache(model_df, filename)
+        return model_df
+
+    @classmethod
+    @timed("PlayByPlayAggregator.aggregate_seasons")
+    def aggregate_seasons(cls, filenames, chunksize=CHUNKSIZE, processes=None):
+        if processes:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                season_sums = list(pool.map(cls.sum_file_in_chunks, filenames, repeat(chunksize)))
+        else:
+            season_sums = [cls.sum_file_in_chunks(filename, chunksize) for filename in filenames]
+        return cls.finalize(cls.merge_sums(*season_sums))
@@ -3,11 +3,16 @@ from sklearn.pipeline import FeatureUnion, Pipeline
 from sklearn.preprocessing import OneHotEncoder
 from services.projection.data_cleaning.df_column_selector import DfColumnSelector
 
+HYPERPARAMETERS = {}
+
 
 class FantasyRegressor():
-    def __init__(self, target_column):
+    def __init__(self, target_column, hyperparameters=None):
         self.target_column = target_column
-        self.regressor = XGBRegressor(objective=self.objective())
+        self.hyperparameters = (HYPERPARAMETERS
+                                if hyperparameters is None else hyperparameters)
+        self.regressor = XGBRegressor(
+            objective=self.objective(), **self.hyperparameters)
         self.feature_pipeline = self.create_feature_pipeline()
         
     def fit(self, X):
@@ -1,5 +1,8 @@
+from services.instrumentation import instrumentation, timed
 from services.schedule_fetcher import pull_schedule
-from services.projection.fantasy_regressor import FantasyRegressor
+from services.projection.artifact_cache import (artifact_key, load_artifact,
+                                                save_artifact)
+from services.projection.fantasy_regressor import FantasyRegressor, HYPERPARAMETERS
 from services.projection.data_cleaning.play_by_play_aggregator import PlayByPlayAggregator
 
 TARGETS = [
@@ -13,11 +16,38 @@ TARGETS = [
     "CompletePct"
 ]
 
-def project():
-    schedule = pull_schedule()
-    model_df = PlayByPlayAggregator.aggregate()
-    for target in TARGETS:
-        regressor = FantasyRegressor(target).fit(model_df)
+@timed("projection.train_regressors")
+def train_regressors(model_df, hyperparameters=None, force_retrain=False, use_cache=True):
+    hyperparameters = (HYPERPARAMETERS
+                       if hyperparameters is None else hyperparameters)
+    key = artifact_key(model_df, TARGETS, hyperparameters)
+    regressors = None if force_retrain or not use_cache else load_artifact(key)
+    instrumentation.cache("projection.regressors", regressors is not None)
+    if regressors is None:
+        regressors = {
+            target: FantasyRegressor(target, hyperparameters).fit(model_df)
+            for target in TARGETS
+        }
+        if use_cache:
+            save_artifact(key, regressors)
+    return regressors
+
+
+@timed("projection.project")
+def project(season=2019, hyperparameters=None, force_retrain=False, play_by_play_files=None, processes=None,
+            schedule=None, model_df=None, use_cache=True):
+    # schedule and model_df can be passed in to project offline
+    if schedule is None:
+        schedule = pull_schedule(season=season)
+    else:
+        schedule = schedule.copy()
+    if model_df is None and play_by_play_files:
+        model_df = PlayByPlayAggregator.aggregate_seasons(play_by_play_files, processes=processes)
+    elif model_df is None:
+        model_df = PlayByPlayAggregator.aggregate(use_cache=use_cache)
+    regressors = train_regressors(
+        model_df, hyperparameters=hyperparameters, force_retrain=force_retrain, use_cache=use_cache)
+    for target, regressor in regressors.items():
         schedule[target] = regressor.predict(schedule)
 
     schedule["CompletePass"] = schedule["PassAttempt"] * schedule["CompletePct"]
@@ -0,0 +1,109 @@
+# coding: utf8
+
+from models.settings import (DEFAULT_ROSTER_SETTINGS, DEFAULT_SCORING_SETTINGS,
+                             merge_settings)
+from models.valuation import (ReplacementIndex, independent_start_pcts,
+                              values_over_replacement, weekly_rank_tables)
+from services.injury_simulator import (INJURY_SIMULATIONS, INJURY_STATS,
+                                       simulate_injury_rates)
+from services.instrumentation import timed
+
+import numpy as np
+import pandas as pd
+import time
+
+
+def scenario_settings(scenarios):
+    # scenarios maps a name to scoring_settings and roster_settings
+    # overrides, same as the League constructor takes
+    return {
+        name: (merge_settings(DEFAULT_SCORING_SETTINGS,
+                              scenario.get('scoring_settings')),
+               merge_settings(DEFAULT_ROSTER_SETTINGS,
+                              scenario.get('roster_settings')))
+        for name, scenario in scenarios.items()
+    }
+
+
+def scoring_matrix(projection_store, scoring_settings):
+    # categories x scenarios
+    return np.stack(
+        [
+            projection_store.scoring_vector(settings)
+            for settings in scoring_settings
+        ],
+        axis=1)
+
+
+def auction_values(points, positions, injury_simulations, replacement_level,
+                   roster_settings):
+    start_pcts = independent_start_pcts(
+        weekly_rank_tables(points, positions,
+                           roster_settings['flex_positions']), positions,
+        injury_simulations, roster_settings)
+    auction_vor = values_over_replacement(
+        points,
+        positions,
+        injury_simulations,
+        replacement_level,
+        start_pcts=start_pcts)
+    auction_budget = ((roster_settings['auction_budget'] -
+                       roster_settings['defense'] - roster_settings['kicker'])
+                      * roster_settings['teams'])
+    return auction_vor * auction_budget / auction_vor.sum()
+
+
+@timed('scenario_evaluator.evaluate_scenarios')
+def evaluate_scenarios(projection_store,
+                       scenarios,
+                       injury_simulations=None,
+                       injury_seed=None):
+    start = time.perf_counter()
+    settings = scenario_settings(scenarios)
+    names = list(settings)
+    if injury_simulations is None:
+        injury_simulations = simulate_injury_rates(
+            INJURY_STATS, simulations=INJURY_SIMULATIONS, seed=injury_seed)
+    positions = projection_store.positions
+
+    # players x weeks x scenarios from one pass over the stats tensor
+    points = projection_store.stats @ scoring_matrix(
+        projection_store, [settings[name][0] for name in names])
+
+    columns = {}
+    replacement_levels = {}
+    for column, name in enumerate(names):
+        roster_settings = settings[name][1]
+        scenario_points = np.ascontiguousarray(points[..., column])
+        season_points = scenario_points.sum(axis=1)
+        replacement_level = ReplacementIndex(
+            ids=projection_store.ids,
+            positions=positions,
+            season_points=season_points,
+            roster_settings=roster_settings).levels()
+        vor = values_over_replacement(scenario_points, positions,
+                                      injury_simulations, replacement_level)
+        replacement_levels[name] = replacement_level
+        columns[('points', name)] = season_points
+        columns[('vor', name)] = vor
+        columns[('rank', name)] = np.argsort(
+            np.argsort(-vor, kind='stable'), kind='stable') + 1
+        if roster_settings['auction_budget']:
+            columns[('auction_value', name)] = auction_values(
+                scenario_points, positions, injury_simulations,
+                replacement_level, roster_settings)
+
+    players = pd.DataFrame(
+        columns,
+        index=pd.MultiIndex.from_arrays(
+            [
+                projection_store.ids, projection_store.names, positions,
+                projection_store.nfl_teams
+            ],
+            names=['id', 'player', 'position', 'tm']))
+    players.columns.names = ['metric', 'scenario']
+    return {
+        'players': players,
+        'replacement_levels': pd.DataFrame(replacement_levels),
+        'elapsed': time.perf_counter() - start,
+    }
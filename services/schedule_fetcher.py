@@ -1,26 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from definitions import ROOT_DIR
+from requests.adapters import HTTPAdapter
+from services.atomic_file import atomic_write
+from services.instrumentation import instrumentation, timed
+
+import os
 import pandas as pd
 import requests
+import time
 import xmltodict
 
-def pull_schedule():
-    schedule_df = pd.DataFrame()
-    for week in range(1, 17):
-        response = requests.get(f"http://www.nfl.com/ajax/scorestrip?season=2019&seasonType=REG&week={week}")
-        for game in xmltodict.parse(response.text)["ss"]["gms"]["g"]:
-            schedule_df = schedule_df.append(
-                pd.DataFrame(
-                    {"Offense": [game["@h"]], 
-                     "DefensiveTeam": [game["@v"]], 
-                     "OffenseIsHome": [True], 
-                     "week": [week]}
-                ), 
-                ignore_index=True)
-            schedule_df = schedule_df.append(
-                pd.DataFrame(
-                    {"Offense": [game["@v"]], 
-                     "DefensiveTeam": [game["@h"]], 
-                     "OffenseIsHome": [False], 
-                     "week": [week]}
-                ), 
-                ignore_index=True)
-    return schedule_df
\ No newline at end of file
+BASE_URL = "http://www.nfl.com/ajax/scorestrip"
+CACHE_DIR = os.path.join(ROOT_DIR, "cache", "schedule")
+CACHE_TTL = 24 * 60 * 60
+
+
+def create_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_week(session, season, week, base_url=BASE_URL, cache_dir=CACHE_DIR, ttl=CACHE_TTL):
+    cache_path = os.path.join(cache_dir, f"{season}_{week}.xml") if cache_dir else None
+    fresh = cache_path and os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < ttl
+    instrumentation.cache("schedule_fetcher.fetch_week", bool(fresh))
+    if fresh:
+        with open(cache_path) as cached:
+            return cached.read()
+
+    response = session.get(base_url, params={"season": season, "seasonType": "REG", "week": week}, timeout=30)
+    response.raise_for_status()
+    if cache_path:
+        with atomic_write(cache_path, "w") as output:
+            output.write(response.text)
+    return response.text
+
+
+def parse_games(xml, week):
+    games = xmltodict.parse(xml)["ss"]["gms"]["g"]
+    if isinstance(games, dict):
+        # xmltodict collapses a single game week into one dict
+        games = [games]
+    rows = []
+    for game in games:
+        rows.append({"Offense": game["@h"], "DefensiveTeam": game["@v"], "OffenseIsHome": True, "week": week})
+        rows.append({"Offense": game["@v"], "DefensiveTeam": game["@h"], "OffenseIsHome": False, "week": week})
+    return rows
+
+
+@timed("schedule_fetcher.pull_schedule")
+def pull_schedule(season=2019, weeks=range(1, 17), base_url=BASE_URL, max_workers=8, cache_dir=CACHE_DIR,
+                  ttl=CACHE_TTL):
+    weeks = list(weeks)
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        responses = list(pool.map(
+            lambda week: fetch_week(session, season, week, base_url=base_url, cache_dir=cache_dir, ttl=ttl),
+            weeks))
+    rows = [row for week, xml in zip(weeks, responses) for row in parse_games(xml, week)]
+    return pd.DataFrame(rows, columns=["Offense", "DefensiveTeam", "OffenseIsHome", "week"])
@@ -1,49 +1,149 @@
 # coding: utf8
 
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from definitions import ROOT_DIR
+from services.atomic_file import atomic_write
+from services.instrumentation import instrumentation, timed
+
+import json
+import lxml.html
+import os
+import threading
 import time
-from bs4 import BeautifulSoup
+import urllib.error
+import urllib.request
 
 # credit to https://intoli.com/blog/fantasy-football-for-hackers/
 
+BASE_URL = "https://www.fantasysharks.com/apps/bert/forecasts/projections.php"
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'projection_pages')
+POSITION_MAP = {'rb': 2, 'wr': 4, 'te': 5, 'qb': 1}
 
-def fetch_projections_page(week, position_id):
-    assert 1 <= week <= 17, f"Invalid week: {week}"
 
-    base_url = "https://www.fantasysharks.com/apps/bert/forecasts/projections.php"
-    url = f"{base_url}?League=-1&Position={position_id}&scoring=1&Segment={659+week}&uid=4"
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens +
+                                  (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 
-    request = urllib.request.Request(url)
+def projections_url(week, position_id, base_url=BASE_URL):
+    return f"{base_url}?League=-1&Position={position_id}&scoring=1&Segment={659+week}&uid=4"
+
+
+@timed('scrape_projections.fetch_projections_page')
+def fetch_projections_page(week,
+                           position_id,
+                           base_url=BASE_URL,
+                           cache_dir=CACHE_DIR,
+                           rate_limiter=None):
+    assert 1 <= week <= 17, f"Invalid week: {week}"
+
+    request = urllib.request.Request(
+        projections_url(week, position_id, base_url))
     request.add_header('User-Agent', 'projection-scraper 0.1')
-    with urllib.request.urlopen(request) as response:
-        return response.read()
-
-
-def scrape_projections():
-    for week in range(1, 2):  # If your league uses week 17 you should quit
-        position_map = {'rb': 2, 'wr': 4, 'te': 5, 'qb': 1}
-        for position, position_id in position_map.items():
-            time.sleep(5)
-            html = fetch_projections_page(week, position_map[position])
-            soup = BeautifulSoup(html, 'lxml')
-
-            table = soup.find('table', id='toolData')
-            header_row = table.find('tr')
-            column_names = [th.text for th in header_row.find_all('th')]
-
-            for row in table.find_all('tr'):
-                column_entries = [tr.text for tr in row.find_all('td')]
-
-                # exclude repeated header rows and the "Tier N" rows
-                if len(column_entries) != len(column_names):
-                    continue
-
-                # extract Fantasy Shark's player id
-                player_link = row.find('a')
-                player_id = int(player_link['href'].split('=')[-1].strip())
-
-                # yield a dictionary of this player's weekly projection
-                player = {'id': player_id, 'week': week, 'position': position}
-                for key, entry in zip(column_names, column_entries):
-                    player[key.lower()] = entry
-                yield player
+
+    page_path = meta_path = None
+    cached_meta = {}
+    if cache_dir:
+        page_path = os.path.join(cache_dir, f"{week}_{position_id}.html")
+        meta_path = f"{page_path}.json"
+        if os.path.exists(page_path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path) as meta_file:
+                    cached_meta = json.load(meta_file)
+            except ValueError:
+                cached_meta = None
+            if not isinstance(cached_meta, dict):
+                # Unreadable headers just mean downloading the page again
+                cached_meta = {}
+            # Revalidate instead of downloading the page again
+            if cached_meta.get('etag'):
+                request.add_header('If-None-Match', cached_meta['etag'])
+            if cached_meta.get('last_modified'):
+                request.add_header('If-Modified-Since',
+                                   cached_meta['last_modified'])
+
+    if rate_limiter:
+        rate_limiter.acquire()
+    try:
+        with urllib.request.urlopen(request) as response:
+            html = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as error:
+        if error.code == 304 and cached_meta:
+            instrumentation.cache('scrape_projections.page', True)
+            with open(page_path, 'rb') as cached_page:
+                return cached_page.read()
+        raise
+
+    instrumentation.cache('scrape_projections.page', False)
+    if cache_dir:
+        with atomic_write(page_path) as output:
+            output.write(html)
+        with atomic_write(meta_path, 'w') as output:
+            json.dump({
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified')
+            }, output)
+    return html
+
+
+def parse_projections(html, week, position):
+    table, = lxml.html.fromstring(html).xpath('//table[@id="toolData"]')
+    rows = table.xpath('.//tr')
+    column_names = [th.text_content() for th in rows[0].xpath('./th')]
+
+    for row in rows:
+        column_entries = [td.text_content() for td in row.xpath('./td')]
+
+        # exclude repeated header rows and the "Tier N" rows
+        if len(column_entries) != len(column_names):
+            continue
+
+        # extract Fantasy Shark's player id
+        player_link = row.xpath('.//a[@href]')[0]
+        player_id = int(player_link.get('href').split('=')[-1].strip())
+
+        # yield a dictionary of this player's weekly projection
+        player = {'id': player_id, 'week': week, 'position': position}
+        for key, entry in zip(column_names, column_entries):
+            player[key.lower()] = entry
+        yield player
+
+
+def scrape_projections(weeks=range(1, 17),
+                       positions=None,
+                       base_url=BASE_URL,
+                       cache_dir=CACHE_DIR,
+                       max_workers=4,
+                       requests_per_second=1.0):
+    # If your league uses week 17 you should quit
+    positions = positions or list(POSITION_MAP)
+    pages = [(week, position) for week in weeks for position in positions]
+    rate_limiter = TokenBucket(requests_per_second, capacity=max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        htmls = pool.map(
+            lambda page: fetch_projections_page(
+                page[0],
+                POSITION_MAP[page[1]],
+                base_url=base_url,
+                cache_dir=cache_dir,
+                rate_limiter=rate_limiter), pages)
+        for (week, position), html in zip(pages, htmls):
+            yield from parse_projections(html, week, position)
@@ -0,0 +1,147 @@
+# coding: utf8
+
+from models.roster_value import best_lineup_points
+from models.valuation import REPLACEMENT_POSITIONS
+from services.draft_simulator import summarize
+from services.injury_simulator import INJURY_STATS, simulate_injury_weeks
+from services.instrumentation import timed
+
+import numpy as np
+import time
+
+POINT_NOISE = 0.4
+CANDIDATE_CHUNK = 16
+
+
+def injury_parameters(positions, injury_stats=INJURY_STATS):
+    likelihood = np.array([
+        injury_stats.get(str(position), {}).get('likelihood', 0.0)
+        for position in positions
+    ])
+    duration_mean = np.array([
+        injury_stats.get(str(position), {}).get('duration_mean', 0.0)
+        for position in positions
+    ])
+    return likelihood, duration_mean
+
+
+def sample_points(points, positions, simulations, point_noise, rng,
+                  injury_stats=INJURY_STATS):
+    # simulations x players x weeks, zeroed while injured and scaled by a
+    # multiplicative weekly noise term
+    likelihood, duration_mean = injury_parameters(positions, injury_stats)
+    injured = simulate_injury_weeks(
+        likelihood,
+        duration_mean,
+        simulations=simulations,
+        weeks=points.shape[-1],
+        rng=rng)
+    noise = np.maximum(
+        1 + point_noise * rng.standard_normal(injured.shape), 0)
+    return np.where(injured, 0.0, points * noise)
+
+
+def lineup_thresholds(points, positions, roster_settings):
+    # For each position, the points of the weakest starter in every
+    # simulated week, plus the weakest flex starter. Empty slots are worth 0
+    # and a position with no slots can't be broken into
+    positions = np.asarray(positions)
+    thresholds = {}
+    leftovers = []
+    for position in REPLACEMENT_POSITIONS:
+        starters = roster_settings.get(position, 0)
+        position_points = -np.sort(-points[:, positions == position], axis=1)
+        if starters == 0:
+            thresholds[position] = np.full(
+                (points.shape[0], points.shape[-1]), np.inf)
+        elif position_points.shape[1] >= starters:
+            thresholds[position] = position_points[:, starters - 1]
+        else:
+            thresholds[position] = np.zeros(
+                (points.shape[0], points.shape[-1]))
+        if position in roster_settings['flex_positions']:
+            leftovers.append(position_points[:, starters:])
+    flex = roster_settings['flex']
+    if flex == 0 or not leftovers:
+        thresholds['flex'] = np.full((points.shape[0], points.shape[-1]),
+                                     np.inf)
+        return thresholds
+    flex_points = -np.sort(-np.concatenate(leftovers, axis=1), axis=1)
+    if flex_points.shape[1] >= flex:
+        thresholds['flex'] = flex_points[:, flex - 1]
+    else:
+        thresholds['flex'] = np.zeros((points.shape[0], points.shape[-1]))
+    return thresholds
+
+
+def marginal_points(candidate_points, position, thresholds, roster_settings):
+    # Points a candidate adds to the optimal lineup. Starting at their
+    # position bumps the weakest starter down to compete for flex
+    starter = thresholds[position][:, np.newaxis]
+    if position in roster_settings['flex_positions']:
+        flex = thresholds['flex'][:, np.newaxis]
+    else:
+        flex = np.inf
+    # A position with no starters and no flex subtracts inf from inf in the
+    # branch np.where then discards
+    with np.errstate(invalid='ignore'):
+        return np.where(candidate_points > starter,
+                        candidate_points - starter +
+                        np.maximum(starter - flex, 0),
+                        np.maximum(candidate_points - flex, 0))
+
+
+@timed('season_simulator.simulate_season')
+def simulate_season(roster_points,
+                    roster_positions,
+                    roster_settings,
+                    candidate_points=None,
+                    candidate_positions=None,
+                    simulations=10000,
+                    point_noise=POINT_NOISE,
+                    seed=None,
+                    injury_stats=INJURY_STATS):
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    roster_positions = np.asarray(roster_positions)
+    roster_points = np.asarray(roster_points, dtype=float)
+    if candidate_points is not None:
+        candidate_points = np.asarray(candidate_points, dtype=float)
+    if roster_points.ndim != 2:
+        # An empty roster has no weeks of its own to infer, so take them
+        # from the candidates. Flat points are one season total per player
+        weeks = (candidate_points.shape[-1]
+                 if candidate_points is not None and candidate_points.ndim == 2
+                 else 1)
+        roster_points = roster_points.reshape(len(roster_positions), weeks)
+    sampled = sample_points(roster_points, roster_positions, simulations,
+                            point_noise, rng, injury_stats)
+    report = summarize(
+        best_lineup_points(sampled, roster_positions,
+                           roster_settings).sum(axis=-1))
+
+    if candidate_points is not None:
+        candidate_positions = np.asarray(candidate_positions)
+        thresholds = lineup_thresholds(sampled, roster_positions,
+                                       roster_settings)
+        marginal_values = np.zeros(len(candidate_positions))
+        # Chunked to keep the candidate tensor to a few megabytes
+        for chunk in range(0, len(candidate_positions), CANDIDATE_CHUNK):
+            rows = slice(chunk, chunk + CANDIDATE_CHUNK)
+            positions = candidate_positions[rows]
+            candidate_sample = sample_points(candidate_points[rows],
+                                             positions, simulations,
+                                             point_noise, rng, injury_stats)
+            for position in np.unique(positions):
+                position = str(position)
+                if position not in thresholds:
+                    continue
+                in_position = np.flatnonzero(positions == position)
+                gains = marginal_points(candidate_sample[:, in_position],
+                                        position, thresholds,
+                                        roster_settings)
+                marginal_values[chunk + in_position] = gains.sum(
+                    axis=-1).mean(axis=0)
+        report['marginal_values'] = marginal_values
+    report['elapsed'] = time.perf_counter() - start
+    return report